@@ -1,14 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.models.schemas import UserCreate, Token, User
+from app.api.deps import get_auth_service
 from app.services.auth_service import AuthService
 from typing import Dict
 
 router = APIRouter()
-auth_service = AuthService()
 
 
 @router.post("/signup", response_model=Token)
-async def signup(user_data: UserCreate):
+async def signup(
+    user_data: UserCreate,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Register a new user with email and password.
     """
@@ -20,7 +23,11 @@ async def signup(user_data: UserCreate):
 
 
 @router.post("/login", response_model=Token)
-async def login(email: str, password: str):
+async def login(
+    email: str,
+    password: str,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Login with email and password.
     """
@@ -32,7 +39,9 @@ async def login(email: str, password: str):
 
 
 @router.post("/google")
-async def google_auth():
+async def google_auth(
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Initiate Google OAuth login.
     """
@@ -44,7 +53,10 @@ async def google_auth():
 
 
 @router.get("/me", response_model=User)
-async def get_current_user(token: str):
+async def get_current_user(
+    token: str,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Get current authenticated user information.
     """
@@ -56,7 +68,10 @@ async def get_current_user(token: str):
 
 
 @router.post("/logout")
-async def logout(token: str):
+async def logout(
+    token: str,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Logout current user.
     """
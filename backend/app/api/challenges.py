@@ -1,40 +1,86 @@
-from fastapi import APIRouter, HTTPException, Query
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from app.api.deps import get_challenge_service
+from app.core.config import settings
 from app.models.schemas import Challenge
 from app.services.challenge_service import ChallengeService
 from typing import List, Optional
 
 router = APIRouter()
-challenge_service = ChallengeService()
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    """Evaluate If-None-Match (or, without it, If-Modified-Since) against the current version."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # If-None-Match uses weak comparison, so W/"x" matches "x"
+        return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _cached_response(
+    request: Request,
+    body: bytes,
+    version: str,
+    challenge_service: ChallengeService
+) -> Response:
+    """Send a pre-serialized catalog body, or 304 if the client's copy is current."""
+    etag = f'"{version}"'
+    modified_at = challenge_service.catalog.modified_at
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.CHALLENGE_CACHE_MAX_AGE_SECONDS}"
+    }
+    if modified_at:
+        headers["Last-Modified"] = format_datetime(modified_at, usegmt=True)
+    
+    if _not_modified(request, etag, headers.get("Last-Modified")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get("/", response_model=List[Challenge])
 async def get_all_challenges(
+    request: Request,
     category: Optional[str] = None,
-    difficulty: Optional[str] = None
+    difficulty: Optional[str] = None,
+    challenge_service: ChallengeService = Depends(get_challenge_service)
 ):
     """
     Get all challenges, optionally filtered by category or difficulty.
     """
     try:
-        challenges = await challenge_service.get_challenges(
+        body, version = await challenge_service.get_challenges_json(
             category=category,
             difficulty=difficulty
         )
-        return challenges
+        return _cached_response(request, body, version, challenge_service)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{challenge_id}", response_model=Challenge)
-async def get_challenge(challenge_id: int):
+async def get_challenge(
+    request: Request,
+    challenge_id: int,
+    challenge_service: ChallengeService = Depends(get_challenge_service)
+):
     """
     Get a specific challenge by ID.
     """
     try:
-        challenge = await challenge_service.get_challenge_by_id(challenge_id)
-        if not challenge:
+        body, version = await challenge_service.get_challenge_json(challenge_id)
+        if not body:
             raise HTTPException(status_code=404, detail="Challenge not found")
-        return challenge
+        return _cached_response(request, body, version, challenge_service)
     except HTTPException:
         raise
     except Exception as e:
@@ -42,27 +88,35 @@ async def get_challenge(challenge_id: int):
 
 
 @router.get("/category/{category}", response_model=List[Challenge])
-async def get_challenges_by_category(category: str):
+async def get_challenges_by_category(
+    request: Request,
+    category: str,
+    challenge_service: ChallengeService = Depends(get_challenge_service)
+):
     """
     Get all challenges in a specific category.
     """
     try:
-        challenges = await challenge_service.get_challenges(category=category)
-        return challenges
+        body, version = await challenge_service.get_challenges_json(category=category)
+        return _cached_response(request, body, version, challenge_service)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/random/challenge", response_model=Challenge)
-async def get_random_challenge(category: Optional[str] = None):
+async def get_random_challenge(
+    category: Optional[str] = None,
+    challenge_service: ChallengeService = Depends(get_challenge_service)
+):
     """
     Get a random challenge, optionally from a specific category.
     """
     try:
-        challenge = await challenge_service.get_random_challenge(category=category)
-        if not challenge:
+        body = await challenge_service.get_random_challenge_json(category=category)
+        if not body:
             raise HTTPException(status_code=404, detail="No challenges found")
-        return challenge
+        # A different challenge every time, so nothing may be cached
+        return Response(content=body, media_type="application/json", headers={"Cache-Control": "no-store"})
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,40 @@
+from functools import lru_cache
+from app.services.auth_service import AuthService
+from app.services.challenge_service import ChallengeService
+from app.services.evaluation_service import EvaluationService
+from app.services.job_queue import EvaluationJobQueue
+from app.services.progress_service import ProgressService
+
+# Process-wide service instances, injected into the routers with Depends.
+# They all share the Supabase client from app.core.database.
+
+
+@lru_cache
+def get_auth_service() -> AuthService:
+    return AuthService()
+
+
+@lru_cache
+def get_challenge_service() -> ChallengeService:
+    return ChallengeService()
+
+
+@lru_cache
+def get_evaluation_service() -> EvaluationService:
+    return EvaluationService(
+        auth_service=get_auth_service(),
+        challenge_service=get_challenge_service()
+    )
+
+
+@lru_cache
+def get_progress_service() -> ProgressService:
+    return ProgressService(
+        auth_service=get_auth_service(),
+        challenge_service=get_challenge_service()
+    )
+
+
+@lru_cache
+def get_job_queue() -> EvaluationJobQueue:
+    return EvaluationJobQueue(get_evaluation_service())
@@ -1,16 +1,25 @@
-from fastapi import APIRouter, HTTPException, Header
-from app.models.schemas import PromptSubmission, EvaluationResult
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from fastapi.responses import StreamingResponse
+from app.api.deps import get_evaluation_service, get_job_queue
+from app.core.config import settings
+from app.models.schemas import (
+    PromptSubmission, EvaluationResult, EvaluationHistoryPage, EvaluationJob,
+    BatchEvaluationRequest, BatchEvaluationResponse
+)
 from app.services.evaluation_service import EvaluationService
-from typing import List, Optional
+from app.services.job_queue import EvaluationJobQueue
+from typing import Optional
+import asyncio
+import json
 
 router = APIRouter()
-evaluation_service = EvaluationService()
 
 
 @router.post("/", response_model=EvaluationResult)
 async def evaluate_prompt(
     submission: PromptSubmission,
-    authorization: str = Header(None)
+    authorization: str = Header(None),
+    evaluation_service: EvaluationService = Depends(get_evaluation_service)
 ):
     """
     Submit a prompt for evaluation and get scores with improvement suggestions.
@@ -32,29 +41,176 @@ async def evaluate_prompt(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/history", response_model=List[EvaluationResult])
+@router.post("/batch", response_model=BatchEvaluationResponse)
+async def evaluate_batch(
+    batch: BatchEvaluationRequest,
+    authorization: str = Header(None),
+    evaluation_service: EvaluationService = Depends(get_evaluation_service)
+):
+    """
+    Evaluate a list of prompts in one request. Results are returned in order,
+    each with either a result or an error.
+    """
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Authorization header required")
+    
+    if len(batch.submissions) > settings.EVALUATION_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large (max {settings.EVALUATION_BATCH_MAX_SIZE} submissions)"
+        )
+    
+    try:
+        token = authorization.replace("Bearer ", "")
+        
+        results = await evaluation_service.evaluate_batch(
+            user_token=token,
+            submissions=batch.submissions
+        )
+        return BatchEvaluationResponse(results=results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/stream")
+async def evaluate_prompt_stream(
+    submission: PromptSubmission,
+    authorization: str = Header(None),
+    evaluation_service: EvaluationService = Depends(get_evaluation_service)
+):
+    """
+    Submit a prompt for evaluation and stream the results as Server-Sent Events.
+    
+    Events: "token" (AI output chunks), "scores", "suggestions", "saved"
+    (the stored evaluation id) and "error".
+    """
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Authorization header required")
+    
+    token = authorization.replace("Bearer ", "")
+    
+    # Reject bad tokens before the stream starts so clients get a real 401
+    try:
+        await evaluation_service.auth_service.get_user(token)
+    except Exception as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    
+    async def event_stream():
+        try:
+            async for event, data in evaluation_service.evaluate_prompt_stream(
+                user_token=token,
+                challenge_id=submission.challenge_id,
+                user_prompt=submission.user_prompt
+            ):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': f'Evaluation failed: {str(e)}'})}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@router.post("/jobs", response_model=EvaluationJob, status_code=202)
+async def submit_evaluation_job(
+    submission: PromptSubmission,
+    authorization: str = Header(None),
+    evaluation_service: EvaluationService = Depends(get_evaluation_service),
+    job_queue: EvaluationJobQueue = Depends(get_job_queue)
+):
+    """
+    Queue a prompt for evaluation and return a job id to poll.
+    """
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Authorization header required")
+    
+    token = authorization.replace("Bearer ", "")
+    
+    try:
+        user = await evaluation_service.auth_service.get_user(token)
+    except Exception as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    
+    try:
+        return await job_queue.submit(
+            user_id=user.id,
+            challenge_id=submission.challenge_id,
+            user_prompt=submission.user_prompt
+        )
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Evaluation queue is full. Please try again shortly.")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs/{job_id}", response_model=EvaluationJob)
+async def get_evaluation_job(
+    job_id: str,
+    authorization: str = Header(None),
+    evaluation_service: EvaluationService = Depends(get_evaluation_service),
+    job_queue: EvaluationJobQueue = Depends(get_job_queue)
+):
+    """
+    Get the status of a queued evaluation, including its result once completed.
+    """
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Authorization header required")
+    
+    try:
+        token = authorization.replace("Bearer ", "")
+        user = await evaluation_service.auth_service.get_user(token)
+        
+        job = await job_queue.get(job_id, user.id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/history", response_model=EvaluationHistoryPage)
 async def get_evaluation_history(
     authorization: str = Header(None),
-    limit: int = 10,
-    offset: int = 0,
-    challenge_id: Optional[int] = None
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    challenge_id: Optional[int] = None,
+    fields: str = "full",
+    evaluation_service: EvaluationService = Depends(get_evaluation_service)
 ):
     """
-    Get user's evaluation history.
+    Get a page of the user's evaluation history, newest first.
+    
+    Pass next_cursor from the response as ?cursor= to get the next page; it is
+    null on the last page. fields=summary returns only ids, challenge, scores and timestamps; fetch
+    the prompt, AI output and suggestions with GET /{evaluation_id}.
     """
     if not authorization:
         raise HTTPException(status_code=401, detail="Authorization header required")
     
+    if fields not in ("full", "summary"):
+        raise HTTPException(status_code=400, detail="fields must be 'full' or 'summary'")
+    
     try:
         token = authorization.replace("Bearer ", "")
         
         history = await evaluation_service.get_user_history(
             user_token=token,
             limit=limit,
-            offset=offset,
-            challenge_id=challenge_id
+            cursor=cursor,
+            challenge_id=challenge_id,
+            summary=fields == "summary"
         )
         return history
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -62,7 +218,8 @@ async def get_evaluation_history(
 @router.get("/{evaluation_id}", response_model=EvaluationResult)
 async def get_evaluation(
     evaluation_id: int,
-    authorization: str = Header(None)
+    authorization: str = Header(None),
+    evaluation_service: EvaluationService = Depends(get_evaluation_service)
 ):
     """
     Get a specific evaluation by ID.
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
 from app.models.schemas import DashboardStats, ProgressTrend, TopMistake
+from app.api.deps import get_progress_service
 from app.services.progress_service import ProgressService
 from typing import List
 import logging
@@ -7,11 +8,13 @@ import logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-progress_service = ProgressService()
 
 
 @router.get("/dashboard", response_model=DashboardStats)
-async def get_dashboard_stats(authorization: str = Header(None)):
+async def get_dashboard_stats(
+    authorization: str = Header(None),
+    progress_service: ProgressService = Depends(get_progress_service)
+):
     """
     Get user's dashboard statistics including total attempts, average score, and improvement.
     """
@@ -38,24 +41,36 @@ async def get_dashboard_stats(authorization: str = Header(None)):
 @router.get("/trends", response_model=List[ProgressTrend])
 async def get_progress_trends(
     authorization: str = Header(None),
-    days: int = 30
+    days: int = Query(30, ge=1, le=3650),
+    granularity: str = "day",
+    tz: str = "UTC",
+    progress_service: ProgressService = Depends(get_progress_service)
 ):
     """
     Get user's progress trends over time.
+    
+    granularity is day, week or month; tz is an IANA time zone (e.g.
+    Europe/Berlin) so buckets follow the user's calendar. Each trend's
+    date is the first day of its bucket.
     """
     if not authorization:
         raise HTTPException(status_code=401, detail="Authorization header required")
     
     try:
         token = authorization.replace("Bearer ", "")
-        trends = await progress_service.get_progress_trends(token, days)
+        trends = await progress_service.get_progress_trends(token, days, granularity, tz)
         return trends
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/mistakes", response_model=List[TopMistake])
-async def get_top_mistakes(authorization: str = Header(None)):
+async def get_top_mistakes(
+    authorization: str = Header(None),
+    progress_service: ProgressService = Depends(get_progress_service)
+):
     """
     Get user's top 3 most common mistakes based on feedback frequency.
     """
@@ -73,7 +88,8 @@ async def get_top_mistakes(authorization: str = Header(None)):
 @router.get("/category/{category}")
 async def get_category_stats(
     category: str,
-    authorization: str = Header(None)
+    authorization: str = Header(None),
+    progress_service: ProgressService = Depends(get_progress_service)
 ):
     """
     Get statistics for a specific challenge category.
@@ -31,19 +31,85 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_KEY: str
     SUPABASE_JWT_SECRET: str
+    SUPABASE_JWT_AUDIENCE: str = "authenticated"
+    SUPABASE_JWT_ISSUER: str = ""  # Defaults to {SUPABASE_URL}/auth/v1
+    
+    # Auth
+    AUTH_VERIFY_MODE: str = "local"  # "local" (verify JWT signature) or "remote" (ask Supabase Auth)
+    AUTH_REMOTE_FALLBACK: bool = False  # Retry with Supabase Auth when local verification fails
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_TTL_SECONDS: int = 300  # Entries also expire at the token's own exp
+    AUTH_CACHE_MAX_SIZE: int = 10000
     
     # Database
     DATABASE_URL: str
+    DB_THREAD_POOL_SIZE: int = 16  # Threads running blocking Supabase calls
+    DIRECT_DB_ENABLED: bool = False  # Serve hot reads over asyncpg on DATABASE_URL
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 10
+    DB_STATEMENT_CACHE_SIZE: int = 100  # Prepared statements per connection; 0 behind PgBouncer transaction mode
+    
+    # Challenge catalog (in-process copy of the challenges table)
+    CHALLENGE_CATALOG_TTL_SECONDS: int = 300  # Reload interval; unchanged rows keep the same version
+    CHALLENGE_CACHE_MAX_AGE_SECONDS: int = 60  # Browser/CDN freshness for /api/challenges; ETags revalidate after
     
     # AI API
     GROQ_API_KEY: str = ""
+    GROQ_BASE_URL: str = "https://api.groq.com/openai/v1"
     OPENROUTER_API_KEY: str = ""
+    OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
+    OPENROUTER_MODEL: str = ""  # Empty uses DEFAULT_MODEL / EVALUATION_MODEL
     OLLAMA_BASE_URL: str = "http://localhost:11434"
+    OLLAMA_MODEL: str = ""
     HUGGINGFACE_API_KEY: str = ""
+    HUGGINGFACE_BASE_URL: str = "https://router.huggingface.co/v1"
+    HUGGINGFACE_MODEL: str = ""
+    
+    # LLM routing
+    LLM_PROVIDERS: List[str] = ["groq"]  # Preference order until latency samples exist
+    LLM_ROUTING_MIN_SAMPLES: int = 20
+    LLM_HEDGE_ENABLED: bool = False  # Duplicate slow requests to the runner-up backend
+    
+    # Groq rate limits (0 disables the local budget; response headers are always honoured)
+    GROQ_REQUESTS_PER_MINUTE: int = 30
+    GROQ_TOKENS_PER_MINUTE: int = 6000
+    LLM_RETRY_MAX_ATTEMPTS: int = 4
+    LLM_RETRY_DEADLINE_SECONDS: float = 45.0
+    
+    # Outbound HTTP (shared client for AI providers)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2_ENABLED: bool = False  # Requires the 'h2' package (pip install httpx[http2])
     
     # AI Model Settings
     DEFAULT_MODEL: str = "llama-3.1-8b-instant"
     EVALUATION_MODEL: str = "llama-3.1-8b-instant"
+    EVALUATION_MODE: str = "separate"  # "separate" (score, then suggest) or "combined" (one call)
+    
+    # Heuristic pre-scorer (skips the LLM for prompts that would score at the floor)
+    PRESCORER_ENABLED: bool = True
+    PRESCORER_FLOOR_SCORE: int = 2  # Highest estimated total (0-10) treated as the floor
+    PRESCORER_MIN_CONFIDENCE: float = 0.6
+    PRESCORER_MAX_WORDS: int = 8  # Longer prompts always go to the LLM
+    
+    # Evaluation result cache
+    EVALUATION_CACHE_ENABLED: bool = True
+    EVALUATION_CACHE_TTL_SECONDS: int = 86400
+    EVALUATION_CACHE_MAX_SIZE: int = 1000
+    EVALUATION_CACHE_PERSISTENT: bool = False  # Also store results in the evaluation_cache table
+    
+    # Batch evaluation
+    EVALUATION_BATCH_MAX_SIZE: int = 500
+    EVALUATION_BATCH_CONCURRENCY: int = 8
+    EVALUATION_BATCH_INSERT_SIZE: int = 100
+    
+    # Evaluation job queue
+    EVALUATION_JOB_BACKEND: str = "memory"  # "memory" or "supabase" (jobs survive restarts)
+    EVALUATION_JOB_CONCURRENCY: int = 4
+    EVALUATION_JOB_MAX_QUEUE_SIZE: int = 1000
+    EVALUATION_JOB_RESULT_TTL_SECONDS: int = 3600  # How long finished in-memory jobs stay pollable
+    EVALUATION_JOB_LEASE_SECONDS: int = 600  # A running job not updated for this long is reclaimed on startup; keep above the slowest evaluation
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,95 @@
+import importlib.util
+import json
+import logging
+from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
+from typing import Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# One client per worker process, shared by every service
+_client: Optional[Client] = None
+_auth_client: Optional[Client] = None
+
+
+def _build_client() -> Client:
+    # A fresh ClientOptions per client: the library default instance is shared,
+    # which would make every client share one session store
+    return create_client(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_KEY,
+        options=ClientOptions(auto_refresh_token=False, persist_session=False)
+    )
+
+
+def get_supabase() -> Client:
+    """Client for table queries and token lookups. Never holds a user session."""
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
+
+
+def get_auth_client() -> Client:
+    """
+    Client for sign up / sign in / sign out.
+
+    Signing in stores the session on the client and switches its table
+    queries to the user's token, so these flows get their own client and
+    the shared query client keeps using the service key.
+    """
+    global _auth_client
+    if _auth_client is None:
+        _auth_client = _build_client()
+    return _auth_client
+
+
+# Optional direct Postgres pool for hot read paths (DIRECT_DB_ENABLED)
+_pool = None
+
+
+async def _init_connection(conn):
+    # Decode like PostgREST does, so callers see the same row shapes
+    for pg_type in ("json", "jsonb"):
+        await conn.set_type_codec(pg_type, encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+    await conn.set_type_codec("uuid", encoder=str, decoder=str, schema="pg_catalog", format="text")
+
+
+async def init_db_pool():
+    """Open the asyncpg pool (called on application startup). Falls back to PostgREST on failure."""
+    global _pool
+    if not settings.DIRECT_DB_ENABLED or _pool is not None:
+        return _pool
+    
+    if importlib.util.find_spec("asyncpg") is None:
+        logger.warning("DIRECT_DB_ENABLED is set but the 'asyncpg' package is not installed, using PostgREST")
+        return None
+    
+    import asyncpg
+    
+    try:
+        _pool = await asyncpg.create_pool(
+            settings.DATABASE_URL,
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+            init=_init_connection
+        )
+    except Exception as e:
+        logger.error(f"Could not open direct database pool, using PostgREST: {str(e)}")
+        _pool = None
+    return _pool
+
+
+def get_db_pool():
+    """The asyncpg pool, or None when hot reads should go through PostgREST."""
+    return _pool
+
+
+async def close_db_pool():
+    """Close the asyncpg pool (called on application shutdown)."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
@@ -0,0 +1,50 @@
+import httpx
+import importlib.util
+import logging
+from typing import Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# One pooled client per worker process, opened and closed by the app lifespan
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    http2 = settings.HTTP2_ENABLED
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed, using HTTP/1.1")
+        http2 = False
+    
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(30.0)
+    )
+
+
+def init_http_client() -> httpx.AsyncClient:
+    """Create the shared client (called on application startup)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared client, creating it lazily outside the app lifespan."""
+    if _client is None or _client.is_closed:
+        return init_http_client()
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client (called on application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse provider durations such as "7.66s", "2m59.56s", "500ms" or "12" into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+
+    scale = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+
+class RateLimitExceeded(Exception):
+    """The local request/token budget didn't free up before the deadline."""
+
+
+class ProviderRateLimiter:
+    """
+    Paces requests against a provider's requests-per-minute and tokens-per-minute quotas.
+
+    Local budgets are tracked over a sliding 60s window and tightened by the
+    x-ratelimit-* and Retry-After headers the provider returns. A limit of 0
+    disables that local budget.
+    """
+
+    def __init__(self, name: str, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests: deque = deque()  # request timestamps
+        self._tokens: deque = deque()  # (timestamp, tokens)
+        self._window_tokens = 0
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        self._waiting = 0
+        self.throttled = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests currently waiting for budget."""
+        return self._waiting
+
+    async def acquire(self, estimated_tokens: int = 0):
+        """Wait until a request of roughly estimated_tokens fits in the budget."""
+        self._waiting += 1
+        try:
+            # The lock keeps waiters in FIFO order so bursts drain fairly
+            async with self._lock:
+                while True:
+                    delay = self._delay_for(estimated_tokens)
+                    if delay <= 0:
+                        break
+                    self.throttled += 1
+                    await asyncio.sleep(delay)
+
+                now = time.monotonic()
+                self._requests.append(now)
+                self._tokens.append((now, estimated_tokens))
+                self._window_tokens += estimated_tokens
+        finally:
+            self._waiting -= 1
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """Correct the token budget once the provider reports real usage."""
+        delta = actual_tokens - estimated_tokens
+        if delta:
+            self._tokens.append((time.monotonic(), delta))
+            self._window_tokens += delta
+
+    def block_for(self, seconds: float):
+        """Hold every request for at least the given number of seconds."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: httpx.Headers):
+        """Respect Retry-After and exhausted x-ratelimit-remaining-* budgets."""
+        retry_after = parse_duration(headers.get("retry-after"))
+        if retry_after:
+            self.block_for(retry_after)
+
+        for kind in ("requests", "tokens"):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            try:
+                if remaining is not None and reset and int(float(remaining)) <= 0:
+                    self.block_for(reset)
+            except ValueError:
+                continue
+
+    def _delay_for(self, estimated_tokens: int) -> float:
+        now = time.monotonic()
+
+        while self._requests and self._requests[0] <= now - 60.0:
+            self._requests.popleft()
+        while self._tokens and self._tokens[0][0] <= now - 60.0:
+            _, tokens = self._tokens.popleft()
+            self._window_tokens -= tokens
+
+        delay = self._blocked_until - now
+
+        if self.requests_per_minute and len(self._requests) >= self.requests_per_minute:
+            index = len(self._requests) - self.requests_per_minute
+            delay = max(delay, self._requests[index] + 60.0 - now)
+
+        if (
+            self.tokens_per_minute
+            and self._tokens
+            and self._window_tokens + estimated_tokens > self.tokens_per_minute
+        ):
+            # Wait until enough of the window has expired to fit this request
+            freed = 0
+            for timestamp, tokens in self._tokens:
+                freed += tokens
+                if self._window_tokens - freed + estimated_tokens <= self.tokens_per_minute:
+                    delay = max(delay, timestamp + 60.0 - now)
+                    break
+            else:
+                delay = max(delay, self._tokens[-1][0] + 60.0 - now)
+
+        return delay
+
+    def stats(self) -> dict:
+        """Return budget usage and queue depth for monitoring."""
+        return {
+            "queue_depth": self.queue_depth,
+            "requests_in_window": len(self._requests),
+            "tokens_in_window": self._window_tokens,
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "blocked_for_seconds": round(max(0.0, self._blocked_until - time.monotonic()), 2),
+            "throttled": self.throttled
+        }
+
+
+async def send_with_retry(
+    send: Callable[[], Awaitable[httpx.Response]],
+    limiter: ProviderRateLimiter,
+    estimated_tokens: int = 0,
+    max_attempts: int = 4,
+    deadline_seconds: float = 45.0,
+    base_delay: float = 0.5,
+    max_delay: float = 8.0
+) -> httpx.Response:
+    """
+    Send a request through the limiter, retrying transient failures.
+
+    429 and 5xx responses and transport errors are retried with full-jitter
+    exponential backoff (or the provider's Retry-After) as long as the next
+    attempt can start before the deadline. The last response is returned
+    as-is so callers keep their existing status handling. Raises
+    RateLimitExceeded if the limiter has no budget before the deadline.
+    """
+    deadline = time.monotonic() + deadline_seconds
+    attempt = 0
+
+    while True:
+        attempt += 1
+        remaining = deadline - time.monotonic()
+        try:
+            await asyncio.wait_for(limiter.acquire(estimated_tokens), timeout=max(remaining, 0.001))
+        except asyncio.TimeoutError:
+            raise RateLimitExceeded(
+                f"{limiter.name} rate limit reached: no request budget within "
+                f"{deadline_seconds:g}s ({limiter.queue_depth} requests waiting)"
+            ) from None
+
+        error: Optional[Exception] = None
+        response: Optional[httpx.Response] = None
+        try:
+            response = await send()
+        except httpx.TransportError as e:
+            error = e
+
+        if response is not None:
+            limiter.update_from_headers(response.headers)
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                return response
+
+        if attempt >= max_attempts:
+            if error:
+                raise error
+            return response
+
+        retry_after = parse_duration(response.headers.get("retry-after")) if response is not None else None
+        delay = retry_after if retry_after is not None else random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+        if time.monotonic() + delay >= deadline:
+            if error:
+                raise error
+            return response
+
+        logger.warning(
+            f"[{limiter.name}] Transient failure "
+            f"({response.status_code if response is not None else type(error).__name__}), "
+            f"retrying in {delay:.2f}s (attempt {attempt}/{max_attempts})"
+        )
+        await asyncio.sleep(delay)
@@ -2,7 +2,12 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.core.config import settings
+from app.core.database import init_db_pool, close_db_pool
+from app.core.http import init_http_client, close_http_client
+from app.repositories.base import shutdown_db_executor
 from app.api import auth, challenges, evaluate, progress
+from app.api.deps import get_auth_service, get_challenge_service, get_job_queue
+from contextlib import asynccontextmanager
 import logging
 import traceback
 
@@ -13,10 +18,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources on startup and release them on shutdown."""
+    init_http_client()
+    await init_db_pool()
+    await get_job_queue().start()
+    yield
+    await get_job_queue().stop()
+    await close_http_client()
+    await close_db_pool()
+    shutdown_db_executor()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="Test & Improve Your Prompting Skills",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -76,18 +96,38 @@ async def debug_env():
     }
 
 
+@app.get("/debug/stats")
+async def debug_stats():
+    """Debug endpoint to inspect in-process caches"""
+    from app.services.auth_service import user_cache
+    from app.services.evaluation_cache import result_cache
+    from app.services.evaluation_service import evaluation_flight
+    from app.services.llm_providers import llm_router
+    from app.services.prescorer import prompt_prescorer
+    
+    return {
+        "auth_cache": user_cache.stats(),
+        "challenge_catalog": get_challenge_service().catalog.stats(),
+        "evaluation_cache": result_cache.stats(),
+        "evaluation_single_flight": evaluation_flight.stats(),
+        "llm_router": llm_router.stats(),
+        "prescorer": prompt_prescorer.stats(),
+        "evaluation_jobs": {
+            "queue_depth": get_job_queue().queue_depth,
+            "concurrency": get_job_queue().concurrency
+        }
+    }
+
+
 @app.get("/debug/auth")
 async def debug_auth(authorization: str = None):
     """Debug endpoint to test auth"""
-    from app.services.auth_service import AuthService
-    
     if not authorization:
         return {"error": "No authorization header"}
     
     try:
         token = authorization.replace("Bearer ", "")
-        auth_service = AuthService()
-        user = await auth_service.get_user(token)
+        user = await get_auth_service().get_user(token)
         return {
             "success": True,
             "user_id": user.id,
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import datetime
 
 
@@ -64,6 +64,44 @@ class EvaluationResult(BaseModel):
     created_at: datetime
 
 
+class EvaluationSummary(BaseModel):
+    id: int
+    user_id: str
+    challenge_id: int
+    scores: EvaluationScore
+    created_at: datetime
+
+
+class EvaluationHistoryPage(BaseModel):
+    items: Union[List[EvaluationResult], List[EvaluationSummary]]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page; None on the last page
+
+
+class BatchEvaluationRequest(BaseModel):
+    submissions: List[PromptSubmission]
+
+
+class BatchEvaluationItem(BaseModel):
+    index: int
+    result: Optional[EvaluationResult] = None
+    error: Optional[str] = None
+
+
+class BatchEvaluationResponse(BaseModel):
+    results: List[BatchEvaluationItem]
+
+
+class EvaluationJob(BaseModel):
+    id: str
+    user_id: str
+    challenge_id: int
+    status: str  # queued, running, completed, failed
+    result: Optional[EvaluationResult] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
 class DashboardStats(BaseModel):
     total_attempts: int
     average_score: float
@@ -0,0 +1,78 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Optional
+from app.core.config import settings
+from app.core.database import get_db_pool
+
+logger = logging.getLogger(__name__)
+
+# The supabase client is synchronous; its calls run on this bounded pool so
+# DB round trips never block the event loop. Created lazily, so a new app
+# lifespan in the same process gets a fresh pool after a shutdown.
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Get the DB thread pool, creating it if needed."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.DB_THREAD_POOL_SIZE,
+            thread_name_prefix="supabase"
+        )
+    return _executor
+
+
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking call (e.g. query.execute) on the DB thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_db_executor():
+    """Release the DB thread pool (called on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+# Returned by run_direct when the caller should use PostgREST instead
+DIRECT_UNAVAILABLE = object()
+
+
+async def run_direct(operation: Callable[[Any], Awaitable[Any]]) -> Any:
+    """
+    Run `operation(pool)` on the direct Postgres pool.
+
+    Returns DIRECT_UNAVAILABLE when the pool is off or the call fails (the
+    error is logged), so the caller falls back to PostgREST just as it
+    would when the pool could not be opened at startup.
+    """
+    pool = get_db_pool()
+    if pool is None:
+        return DIRECT_UNAVAILABLE
+
+    try:
+        return await operation(pool)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"Direct database query failed, using PostgREST: {str(e)}")
+        return DIRECT_UNAVAILABLE
+
+
+def record_to_dict(record) -> dict:
+    """Convert an asyncpg record to the JSON shape PostgREST returns."""
+    row = {}
+    for key, value in record.items():
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = float(value)
+        row[key] = value
+    return row
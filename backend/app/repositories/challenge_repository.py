@@ -0,0 +1,48 @@
+from supabase import Client
+from app.repositories.base import DIRECT_UNAVAILABLE, record_to_dict, run_blocking, run_direct
+from typing import Dict, List, Optional
+
+# Statements for the direct Postgres path; asyncpg prepares each one once per connection
+_LIST = "SELECT * FROM challenges WHERE ($1::text IS NULL OR category = $1) AND ($2::text IS NULL OR difficulty = $2)"
+_CATEGORIES = "SELECT id, category FROM challenges WHERE id = ANY($1::int[])"
+
+
+class ChallengeRepository:
+    """Async access to the challenges table."""
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+
+    async def list(
+        self,
+        category: Optional[str] = None,
+        difficulty: Optional[str] = None
+    ) -> List[dict]:
+        records = await run_direct(lambda pool: pool.fetch(_LIST, category or None, difficulty or None))
+        if records is not DIRECT_UNAVAILABLE:
+            return [record_to_dict(r) for r in records]
+
+        query = self.supabase.table("challenges").select("*")
+
+        if category:
+            query = query.eq("category", category)
+
+        if difficulty:
+            query = query.eq("difficulty", difficulty)
+
+        response = await run_blocking(query.execute)
+        return response.data or []
+
+    async def get_categories(self, challenge_ids: List[int]) -> Dict[int, str]:
+        """Map challenge ids to their category in one query."""
+        if not challenge_ids:
+            return {}
+
+        records = await run_direct(lambda pool: pool.fetch(_CATEGORIES, challenge_ids))
+        if records is DIRECT_UNAVAILABLE:
+            query = self.supabase.table("challenges")\
+                .select("id, category")\
+                .in_("id", challenge_ids)
+            records = (await run_blocking(query.execute)).data or []
+
+        return {r["id"]: r["category"] for r in records}
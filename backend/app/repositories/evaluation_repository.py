@@ -0,0 +1,184 @@
+from supabase import Client
+from app.repositories.base import DIRECT_UNAVAILABLE, record_to_dict, run_blocking, run_direct
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+# Column sets for readers that don't need the prompt and AI output text,
+# which are by far the largest columns. No spaces: they go into PostgREST's
+# select parameter as-is.
+ALL_COLUMNS = "*"
+SUMMARY_COLUMNS = (
+    "id,user_id,challenge_id,clarity_score,specificity_score,"
+    "creativity_score,relevance_score,overall_score,created_at"
+)
+SCORE_COLUMNS = "id,challenge_id,overall_score,created_at"
+SUGGESTION_COLUMNS = "suggestions"
+
+# Statements for the direct Postgres path; asyncpg prepares each one once per connection
+_SELECT_FOR_USER = "SELECT {columns} FROM evaluations WHERE user_id = $1"
+_HISTORY_ORDER = " ORDER BY created_at DESC, id DESC LIMIT $2"
+_FOR_CHALLENGES = (
+    _SELECT_FOR_USER + " AND challenge_id = ANY($2::int[]) ORDER BY created_at, id"
+)
+_BY_ID_FOR_USER = "SELECT * FROM evaluations WHERE id = $1 AND user_id = $2"
+_DASHBOARD_STATISTICS = "SELECT get_dashboard_statistics($1)"
+_PROGRESS_TRENDS = "SELECT get_progress_trends($1, $2, $3, $4)"
+
+
+class EvaluationRepository:
+    """Async access to the evaluations table."""
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+
+    async def insert(self, row: dict) -> dict:
+        query = self.supabase.table("evaluations").insert(row)
+        response = await run_blocking(query.execute)
+        return response.data[0]
+
+    async def insert_many(self, rows: List[dict]) -> List[dict]:
+        """Bulk insert; rows come back in request order."""
+        query = self.supabase.table("evaluations").insert(rows)
+        response = await run_blocking(query.execute)
+        return response.data or []
+
+    async def get_for_user(self, evaluation_id: int, user_id: str) -> Optional[dict]:
+        record = await run_direct(lambda pool: pool.fetchrow(_BY_ID_FOR_USER, evaluation_id, user_id))
+        if record is not DIRECT_UNAVAILABLE:
+            return record_to_dict(record) if record else None
+
+        query = self.supabase.table("evaluations")\
+            .select("*")\
+            .eq("id", evaluation_id)\
+            .eq("user_id", user_id)
+
+        response = await run_blocking(query.execute)
+        return response.data[0] if response.data else None
+
+    async def list_for_user(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[Tuple[datetime, int]] = None,
+        challenge_id: Optional[int] = None,
+        columns: str = ALL_COLUMNS
+    ) -> List[dict]:
+        """
+        A page of a user's evaluations, newest first by (created_at, id).
+
+        `before` is the (created_at, id) of the last row of the previous page.
+        Seeking past it instead of using OFFSET keeps every page an index range
+        scan, and rows inserted meanwhile don't shift later pages.
+        """
+        sql = _SELECT_FOR_USER.format(columns=columns)
+        args = [user_id, limit]
+        if challenge_id:
+            args.append(challenge_id)
+            sql += f" AND challenge_id = ${len(args)}"
+        if before:
+            args.extend(before)
+            sql += f" AND (created_at, id) < (${len(args) - 1}, ${len(args)})"
+        records = await run_direct(lambda pool: pool.fetch(sql + _HISTORY_ORDER, *args))
+        if records is not DIRECT_UNAVAILABLE:
+            return [record_to_dict(r) for r in records]
+
+        query = self.supabase.table("evaluations")\
+            .select(columns)\
+            .eq("user_id", user_id)\
+            .limit(limit)
+
+        if challenge_id:
+            query = query.eq("challenge_id", challenge_id)
+
+        # postgrest 0.13 has no or_() and order() can't take a tie-breaker
+        # column, so those two parameters are added directly
+        if before:
+            created_at = before[0].isoformat()
+            query.params = query.params.add(
+                "or",
+                f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{before[1]}))'
+            )
+        query.params = query.params.add("order", "created_at.desc,id.desc")
+
+        response = await run_blocking(query.execute)
+        return response.data or []
+
+    async def list_all_for_user(self, user_id: str, columns: str = ALL_COLUMNS) -> List[dict]:
+        records = await run_direct(lambda pool: pool.fetch(_SELECT_FOR_USER.format(columns=columns), user_id))
+        if records is not DIRECT_UNAVAILABLE:
+            return [record_to_dict(r) for r in records]
+
+        query = self.supabase.table("evaluations")\
+            .select(columns)\
+            .eq("user_id", user_id)
+
+        response = await run_blocking(query.execute)
+        return response.data or []
+
+    async def list_since(self, user_id: str, since: str, columns: str = ALL_COLUMNS) -> List[dict]:
+        """A user's evaluations created at or after `since`, oldest first."""
+        query = self.supabase.table("evaluations")\
+            .select(columns)\
+            .eq("user_id", user_id)\
+            .gte("created_at", since)\
+            .order("created_at", desc=False)
+
+        response = await run_blocking(query.execute)
+        return response.data or []
+
+    async def list_for_challenges(
+        self,
+        user_id: str,
+        challenge_ids: List[int],
+        columns: str = ALL_COLUMNS
+    ) -> List[dict]:
+        """A user's evaluations of any of the given challenges, oldest first by (created_at, id)."""
+        if not challenge_ids:
+            return []
+
+        records = await run_direct(
+            lambda pool: pool.fetch(_FOR_CHALLENGES.format(columns=columns), user_id, challenge_ids)
+        )
+        if records is not DIRECT_UNAVAILABLE:
+            return [record_to_dict(r) for r in records]
+
+        query = self.supabase.table("evaluations")\
+            .select(columns)\
+            .eq("user_id", user_id)\
+            .in_("challenge_id", challenge_ids)
+        # Tie-break on id; order() takes one column in postgrest 0.13
+        query.params = query.params.add("order", "created_at,id")
+
+        response = await run_blocking(query.execute)
+        return response.data or []
+
+    async def get_dashboard_statistics(self, user_id: str) -> Optional[dict]:
+        """Dashboard numbers aggregated in Postgres by get_dashboard_statistics()."""
+        stats = await run_direct(lambda pool: pool.fetchval(_DASHBOARD_STATISTICS, user_id))
+        if stats is not DIRECT_UNAVAILABLE:
+            return stats
+
+        query = self.supabase.rpc("get_dashboard_statistics", {"user_uuid": user_id})
+        response = await run_blocking(query.execute)
+        return response.data
+
+    async def get_progress_trends(
+        self,
+        user_id: str,
+        days: int,
+        granularity: str,
+        tz: str
+    ) -> Optional[List[dict]]:
+        """Attempts and average score per day/week/month, bucketed in Postgres by get_progress_trends()."""
+        trends = await run_direct(lambda pool: pool.fetchval(_PROGRESS_TRENDS, user_id, days, granularity, tz))
+        if trends is not DIRECT_UNAVAILABLE:
+            return trends
+
+        query = self.supabase.rpc("get_progress_trends", {
+            "user_uuid": user_id,
+            "days": days,
+            "granularity": granularity,
+            "tz": tz
+        })
+        response = await run_blocking(query.execute)
+        return response.data
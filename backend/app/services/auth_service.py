@@ -1,23 +1,50 @@
-from supabase import create_client, Client
+from supabase import Client
 from app.core.config import settings
+from app.core.database import get_auth_client, get_supabase
+from app.core.cache import TTLCache
 from app.models.schemas import UserCreate, Token, User
+from app.repositories.base import run_blocking
 from datetime import datetime
+from typing import Optional
+import hashlib
+import jwt
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Verified tokens, shared by every AuthService instance in this process
+user_cache = TTLCache(
+    max_size=settings.AUTH_CACHE_MAX_SIZE,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS
+)
+
+
+def _token_key(token: str) -> str:
+    """Cache key for a token, so raw tokens are never kept in memory."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _token_expiry(token: str) -> Optional[float]:
+    """Read the exp claim without verifying; only used to bound cache lifetime."""
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+        return float(claims["exp"]) if "exp" in claims else None
+    except Exception:
+        return None
+
 
 class AuthService:
-    def __init__(self):
-        self.supabase: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_KEY
-        )
+    def __init__(self, supabase: Optional[Client] = None, auth_client: Optional[Client] = None):
+        # Token lookups go through the shared client; sign in/out flows keep
+        # their session on a separate one (see get_auth_client)
+        self.supabase: Client = supabase or get_supabase()
+        self.auth_client: Client = auth_client or get_auth_client()
     
     async def sign_up(self, user_data: UserCreate) -> Token:
         """Register a new user."""
         try:
-            response = self.supabase.auth.sign_up({
+            response = await run_blocking(self.auth_client.auth.sign_up, {
                 "email": user_data.email,
                 "password": user_data.password,
                 "options": {
@@ -48,7 +75,7 @@ class AuthService:
     async def sign_in(self, email: str, password: str) -> Token:
         """Login existing user."""
         try:
-            response = self.supabase.auth.sign_in_with_password({
+            response = await run_blocking(self.auth_client.auth.sign_in_with_password, {
                 "email": email,
                 "password": password
             })
@@ -74,7 +101,7 @@ class AuthService:
     async def google_sign_in(self) -> str:
         """Initiate Google OAuth sign in."""
         try:
-            response = self.supabase.auth.sign_in_with_oauth({
+            response = await run_blocking(self.auth_client.auth.sign_in_with_oauth, {
                 "provider": "google"
             })
             return response.url
@@ -88,63 +115,23 @@ class AuthService:
                 logger.warning("Empty token provided to get_user")
                 raise Exception("Token is required")
             
-            logger.info(f"Getting user with token: {token[:20]}...")
-            
-            # Get user from JWT token with error handling
-            try:
-                user_response = self.supabase.auth.get_user(token)
-            except Exception as supabase_error:
-                logger.error(f"Supabase auth error: {str(supabase_error)}")
-                # Check if it's a token expiration or invalid token error
-                error_str = str(supabase_error).lower()
-                if "expired" in error_str or "invalid" in error_str or "jwt" in error_str:
-                    raise Exception("Invalid or expired token. Please sign in again.")
-                raise Exception(f"Authentication error: {str(supabase_error)}")
-            
-            if not user_response:
-                logger.warning("Empty user_response from Supabase")
-                raise Exception("Invalid token - no response from authentication service")
-            
-            if not hasattr(user_response, 'user'):
-                logger.warning(f"user_response missing 'user' attribute. Type: {type(user_response)}")
-                raise Exception("Invalid token - malformed response from authentication service")
-            
-            if not user_response.user:
-                logger.warning("user_response.user is None")
-                raise Exception("Invalid token - no user found")
-            
-            user_data = user_response.user
+            cache_key = _token_key(token)
+            if settings.AUTH_CACHE_ENABLED:
+                cached_user = user_cache.get(cache_key)
+                if cached_user is not None:
+                    return cached_user
             
-            # Validate required fields
-            if not hasattr(user_data, 'id') or not user_data.id:
-                logger.error("User data missing id")
-                raise Exception("Invalid user data - missing user ID")
-            
-            if not hasattr(user_data, 'email') or not user_data.email:
-                logger.error("User data missing email")
-                raise Exception("Invalid user data - missing email")
+            logger.info(f"Getting user with token: {token[:20]}...")
             
-            # Handle user_metadata safely
-            full_name = None
-            if hasattr(user_data, 'user_metadata') and user_data.user_metadata:
-                full_name = user_data.user_metadata.get("full_name")
+            user = await self._resolve_user(token)
             
-            # Handle created_at safely
-            created_at = datetime.now()
-            if hasattr(user_data, 'created_at') and user_data.created_at:
-                try:
-                    created_at_str = str(user_data.created_at).replace('Z', '+00:00')
-                    created_at = datetime.fromisoformat(created_at_str)
-                except (ValueError, AttributeError) as e:
-                    logger.warning(f"Could not parse created_at: {e}, using current time")
-                    created_at = datetime.now()
+            if settings.AUTH_CACHE_ENABLED:
+                # Never serve a token from cache past its own expiry
+                exp = _token_expiry(token)
+                ttl = settings.AUTH_CACHE_TTL_SECONDS if exp is None else exp - time.time()
+                user_cache.set(cache_key, user, ttl_seconds=ttl)
             
-            return User(
-                id=user_data.id,
-                email=user_data.email,
-                full_name=full_name,
-                created_at=created_at
-            )
+            return user
         except Exception as e:
             logger.error(f"Error in get_user: {str(e)}", exc_info=True)
             # Re-raise with more context if it's already a formatted error
@@ -152,9 +139,115 @@ class AuthService:
                 raise
             raise Exception(f"Failed to get user: {str(e)}")
     
+    def invalidate_token(self, token: str) -> bool:
+        """Drop a token from the verified-token cache (e.g. on logout)."""
+        if not token:
+            return False
+        return user_cache.invalidate(_token_key(token))
+    
+    async def _resolve_user(self, token: str) -> User:
+        """Resolve a token to a user, locally or via Supabase Auth."""
+        if settings.AUTH_VERIFY_MODE == "local" and settings.SUPABASE_JWT_SECRET:
+            try:
+                return self._get_user_from_claims(token)
+            except jwt.ExpiredSignatureError:
+                raise Exception("Invalid or expired token. Please sign in again.")
+            except Exception as local_error:
+                if not settings.AUTH_REMOTE_FALLBACK:
+                    logger.warning(f"Local token verification failed: {str(local_error)}")
+                    raise Exception("Invalid or expired token. Please sign in again.")
+                logger.warning(f"Local token verification failed, falling back to Supabase Auth: {str(local_error)}")
+        
+        return await self._get_user_from_supabase(token)
+    
+    def _get_user_from_claims(self, token: str) -> User:
+        """Verify a Supabase JWT locally and build the user from its claims."""
+        issuer = settings.SUPABASE_JWT_ISSUER or f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1"
+        claims = jwt.decode(
+            token,
+            settings.SUPABASE_JWT_SECRET,
+            algorithms=["HS256"],
+            audience=settings.SUPABASE_JWT_AUDIENCE,
+            issuer=issuer,
+            options={"require": ["exp", "sub", "aud", "iss"]}
+        )
+        
+        if not claims.get("email"):
+            raise Exception("Invalid user data - missing email")
+        
+        user_metadata = claims.get("user_metadata") or {}
+        
+        # Supabase access tokens don't carry the account creation time,
+        # so fall back to the current time like the remote lookup does
+        return User(
+            id=claims["sub"],
+            email=claims["email"],
+            full_name=user_metadata.get("full_name"),
+            created_at=datetime.now()
+        )
+    
+    async def _get_user_from_supabase(self, token: str) -> User:
+        """Look up the user behind a token with a round trip to Supabase Auth."""
+        # Get user from JWT token with error handling
+        try:
+            user_response = await run_blocking(self.supabase.auth.get_user, token)
+        except Exception as supabase_error:
+            logger.error(f"Supabase auth error: {str(supabase_error)}")
+            # Check if it's a token expiration or invalid token error
+            error_str = str(supabase_error).lower()
+            if "expired" in error_str or "invalid" in error_str or "jwt" in error_str:
+                raise Exception("Invalid or expired token. Please sign in again.")
+            raise Exception(f"Authentication error: {str(supabase_error)}")
+        
+        if not user_response:
+            logger.warning("Empty user_response from Supabase")
+            raise Exception("Invalid token - no response from authentication service")
+        
+        if not hasattr(user_response, 'user'):
+            logger.warning(f"user_response missing 'user' attribute. Type: {type(user_response)}")
+            raise Exception("Invalid token - malformed response from authentication service")
+        
+        if not user_response.user:
+            logger.warning("user_response.user is None")
+            raise Exception("Invalid token - no user found")
+        
+        user_data = user_response.user
+        
+        # Validate required fields
+        if not hasattr(user_data, 'id') or not user_data.id:
+            logger.error("User data missing id")
+            raise Exception("Invalid user data - missing user ID")
+        
+        if not hasattr(user_data, 'email') or not user_data.email:
+            logger.error("User data missing email")
+            raise Exception("Invalid user data - missing email")
+        
+        # Handle user_metadata safely
+        full_name = None
+        if hasattr(user_data, 'user_metadata') and user_data.user_metadata:
+            full_name = user_data.user_metadata.get("full_name")
+        
+        # Handle created_at safely
+        created_at = datetime.now()
+        if hasattr(user_data, 'created_at') and user_data.created_at:
+            try:
+                created_at_str = str(user_data.created_at).replace('Z', '+00:00')
+                created_at = datetime.fromisoformat(created_at_str)
+            except (ValueError, AttributeError) as e:
+                logger.warning(f"Could not parse created_at: {e}, using current time")
+                created_at = datetime.now()
+        
+        return User(
+            id=user_data.id,
+            email=user_data.email,
+            full_name=full_name,
+            created_at=created_at
+        )
+    
     async def sign_out(self, token: str):
         """Sign out user."""
         try:
-            self.supabase.auth.sign_out()
+            self.invalidate_token(token)
+            await run_blocking(self.auth_client.auth.sign_out)
         except Exception as e:
             raise Exception(f"Sign out failed: {str(e)}")
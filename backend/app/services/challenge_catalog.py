@@ -0,0 +1,155 @@
+import hashlib
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from pydantic import TypeAdapter
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.models.schemas import Challenge
+from app.repositories.challenge_repository import ChallengeRepository
+
+logger = logging.getLogger(__name__)
+
+FilterKey = Tuple[Optional[str], Optional[str]]  # (category, difficulty)
+
+_challenge_json = TypeAdapter(Challenge)
+_challenge_list_json = TypeAdapter(List[Challenge])
+
+
+class ChallengeCatalog:
+    """
+    Process-local copy of the challenges table, indexed by id, category and difficulty.
+
+    The table is small and rarely changes, so it is loaded whole and reloaded
+    once the TTL passes or after invalidate(). The version is a hash of the
+    rows; a reload that finds the same version keeps the existing indexes.
+    Returned lists are shared with the index and must not be mutated.
+
+    JSON bodies for every list and challenge are serialized once per
+    version, so HTTP responses can be served without re-encoding.
+    """
+
+    def __init__(
+        self,
+        repository: ChallengeRepository,
+        ttl_seconds: float = settings.CHALLENGE_CATALOG_TTL_SECONDS
+    ):
+        self.repository = repository
+        self.ttl_seconds = ttl_seconds
+        self.version: Optional[str] = None
+        self.modified_at: Optional[datetime] = None
+        self._loaded_at = 0.0
+        self._by_id: Dict[int, Challenge] = {}
+        self._by_filter: Dict[FilterKey, List[Challenge]] = {}
+        self._json_by_id: Dict[int, bytes] = {}
+        self._json_by_filter: Dict[FilterKey, bytes] = {}
+        self._flight = SingleFlight()
+        self.loads = 0
+        self.reindexes = 0
+
+    async def list(
+        self,
+        category: Optional[str] = None,
+        difficulty: Optional[str] = None
+    ) -> List[Challenge]:
+        """Challenges matching the filters, ordered by id."""
+        await self._ensure_fresh()
+        return self._by_filter.get((category or None, difficulty or None), [])
+
+    async def get(self, challenge_id: int) -> Optional[Challenge]:
+        await self._ensure_fresh()
+        return self._by_id.get(challenge_id)
+
+    async def get_many(self, challenge_ids: List[int]) -> Dict[int, Challenge]:
+        await self._ensure_fresh()
+        return {i: self._by_id[i] for i in challenge_ids if i in self._by_id}
+
+    async def random(self, category: Optional[str] = None) -> Optional[Challenge]:
+        challenges = await self.list(category=category)
+        return random.choice(challenges) if challenges else None
+
+    async def list_json(
+        self,
+        category: Optional[str] = None,
+        difficulty: Optional[str] = None
+    ) -> Tuple[bytes, str]:
+        """Serialized list for the filters, with the catalog version it came from."""
+        await self._ensure_fresh()
+        return self._json_by_filter.get((category or None, difficulty or None), b"[]"), self.version
+
+    async def get_json(self, challenge_id: int) -> Tuple[Optional[bytes], str]:
+        """Serialized challenge (None if unknown), with the catalog version it came from."""
+        await self._ensure_fresh()
+        return self._json_by_id.get(challenge_id), self.version
+
+    async def random_json(self, category: Optional[str] = None) -> Optional[bytes]:
+        challenge = await self.random(category=category)
+        return self._json_by_id.get(challenge.id) if challenge else None
+
+    def invalidate(self):
+        """Reload on the next read (e.g. after challenges were edited)."""
+        self._loaded_at = float("-inf")
+
+    async def _ensure_fresh(self):
+        if self.version is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return
+
+        try:
+            # Concurrent readers of a stale catalog share one reload
+            await self._flight.do("load", self._load)
+        except Exception as e:
+            if self.version is None:
+                raise
+            logger.warning(f"Challenge catalog reload failed, serving version {self.version}: {str(e)}")
+
+    async def _load(self):
+        rows = await self.repository.list()
+        self.loads += 1
+        challenges = sorted((Challenge(**row) for row in rows), key=lambda c: c.id)
+
+        version = self._version_of(challenges)
+        if version != self.version:
+            self._index(challenges, version)
+        self._loaded_at = time.monotonic()
+
+    def _index(self, challenges: List[Challenge], version: str):
+        by_filter: Dict[FilterKey, List[Challenge]] = defaultdict(list)
+        for challenge in challenges:
+            for key in (
+                (None, None),
+                (challenge.category, None),
+                (None, challenge.difficulty),
+                (challenge.category, challenge.difficulty)
+            ):
+                by_filter[key].append(challenge)
+
+        json_by_id = {c.id: _challenge_json.dump_json(c) for c in challenges}
+        json_by_filter = {key: _challenge_list_json.dump_json(value) for key, value in by_filter.items()}
+
+        # Swap whole structures so readers never see a half-built index
+        self._by_id = {c.id: c for c in challenges}
+        self._by_filter = dict(by_filter)
+        self._json_by_id = json_by_id
+        self._json_by_filter = json_by_filter
+        self.version = version
+        self.modified_at = datetime.now(timezone.utc).replace(microsecond=0)
+        self.reindexes += 1
+
+    @staticmethod
+    def _version_of(challenges: List[Challenge]) -> str:
+        payload = json.dumps([c.model_dump(mode="json") for c in challenges], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "challenges": len(self._by_id),
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self.version else None,
+            "ttl_seconds": self.ttl_seconds,
+            "loads": self.loads,
+            "reindexes": self.reindexes
+        }
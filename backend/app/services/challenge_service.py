@@ -1,16 +1,20 @@
-from supabase import create_client, Client
-from app.core.config import settings
+from supabase import Client
+from app.core.database import get_supabase
 from app.models.schemas import Challenge
-from typing import List, Optional
-import random
+from app.repositories.challenge_repository import ChallengeRepository
+from app.services.challenge_catalog import ChallengeCatalog
+from typing import Dict, List, Optional, Tuple
 
 
 class ChallengeService:
-    def __init__(self):
-        self.supabase: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_KEY
-        )
+    def __init__(
+        self,
+        supabase: Optional[Client] = None,
+        catalog: Optional[ChallengeCatalog] = None
+    ):
+        self.supabase: Client = supabase or get_supabase()
+        self.challenges = ChallengeRepository(self.supabase)
+        self.catalog = catalog or ChallengeCatalog(self.challenges)
     
     async def get_challenges(
         self,
@@ -19,48 +23,58 @@ class ChallengeService:
     ) -> List[Challenge]:
         """Get all challenges with optional filters."""
         try:
-            query = self.supabase.table("challenges").select("*")
-            
-            if category:
-                query = query.eq("category", category)
-            
-            if difficulty:
-                # Normalize difficulty to lowercase for case-insensitive matching
-                difficulty_lower = difficulty.lower()
-                query = query.eq("difficulty", difficulty_lower)
-            
-            response = query.execute()
-            
-            if not response.data:
-                return []
-            
-            return [Challenge(**challenge) for challenge in response.data]
+            # Normalize difficulty to lowercase for case-insensitive matching
+            return await self.catalog.list(
+                category=category,
+                difficulty=difficulty.lower() if difficulty else None
+            )
         except Exception as e:
             raise Exception(f"Failed to fetch challenges: {str(e)}")
     
     async def get_challenge_by_id(self, challenge_id: int) -> Optional[Challenge]:
         """Get a specific challenge by ID."""
         try:
-            response = self.supabase.table("challenges")\
-                .select("*")\
-                .eq("id", challenge_id)\
-                .execute()
-            
-            if not response.data:
-                return None
-            
-            return Challenge(**response.data[0])
+            return await self.catalog.get(challenge_id)
+        except Exception as e:
+            raise Exception(f"Failed to fetch challenge: {str(e)}")
+    
+    async def get_challenges_by_ids(self, challenge_ids: List[int]) -> Dict[int, Challenge]:
+        """Get several challenges, keyed by ID."""
+        try:
+            return await self.catalog.get_many(challenge_ids)
+        except Exception as e:
+            raise Exception(f"Failed to fetch challenges: {str(e)}")
+    
+    async def get_challenges_json(
+        self,
+        category: Optional[str] = None,
+        difficulty: Optional[str] = None
+    ) -> Tuple[bytes, str]:
+        """Pre-serialized get_challenges() body and the catalog version it belongs to."""
+        try:
+            return await self.catalog.list_json(
+                category=category,
+                difficulty=difficulty.lower() if difficulty else None
+            )
+        except Exception as e:
+            raise Exception(f"Failed to fetch challenges: {str(e)}")
+    
+    async def get_challenge_json(self, challenge_id: int) -> Tuple[Optional[bytes], str]:
+        """Pre-serialized challenge (None if not found) and the catalog version."""
+        try:
+            return await self.catalog.get_json(challenge_id)
         except Exception as e:
             raise Exception(f"Failed to fetch challenge: {str(e)}")
     
+    async def get_random_challenge_json(self, category: Optional[str] = None) -> Optional[bytes]:
+        try:
+            return await self.catalog.random_json(category=category)
+        except Exception as e:
+            raise Exception(f"Failed to fetch random challenge: {str(e)}")
+    
     async def get_random_challenge(self, category: Optional[str] = None) -> Optional[Challenge]:
         """Get a random challenge, optionally from a specific category."""
         try:
-            challenges = await self.get_challenges(category=category)
-            
-            if not challenges:
-                return None
-            
-            return random.choice(challenges)
+            return await self.catalog.random(category=category)
         except Exception as e:
             raise Exception(f"Failed to fetch random challenge: {str(e)}")
@@ -0,0 +1,94 @@
+from supabase import Client
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.repositories.base import run_blocking
+from app.models.schemas import EvaluationScore, ImprovementSuggestion
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+# In-memory tier, shared by every EvaluationCache in this process
+result_cache = TTLCache(
+    max_size=settings.EVALUATION_CACHE_MAX_SIZE,
+    ttl_seconds=settings.EVALUATION_CACHE_TTL_SECONDS
+)
+
+CachedEvaluation = Tuple[str, EvaluationScore, List[ImprovementSuggestion]]
+
+
+class EvaluationCache:
+    """
+    Content-addressed cache of LLM evaluation results.
+    
+    Keys are computed by the caller from the challenge, the normalized
+    prompt and everything else that affects the LLM output. Entries live in
+    an in-process LRU and, optionally, in the evaluation_cache table so they
+    survive restarts and are shared between workers.
+    """
+    
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+    
+    async def get(self, key: str) -> Optional[CachedEvaluation]:
+        """Look up a cached result, checking memory first, then the backing table."""
+        entry = result_cache.get(key)
+        if entry is not None:
+            return entry
+        
+        if not settings.EVALUATION_CACHE_PERSISTENT:
+            return None
+        
+        try:
+            query = self.supabase.table("evaluation_cache")\
+                .select("ai_output, scores, suggestions, expires_at")\
+                .eq("cache_key", key)\
+                .gt("expires_at", datetime.now(timezone.utc).isoformat())
+            response = await run_blocking(query.execute)
+        except Exception as e:
+            logger.warning(f"Evaluation cache lookup failed: {str(e)}")
+            return None
+        
+        if not response.data:
+            return None
+        
+        row = response.data[0]
+        entry = (
+            row["ai_output"],
+            EvaluationScore(**row["scores"]),
+            [ImprovementSuggestion(**s) for s in row["suggestions"]]
+        )
+        expires_at = datetime.fromisoformat(row["expires_at"].replace('Z', '+00:00'))
+        result_cache.set(key, entry, ttl_seconds=(expires_at - datetime.now(timezone.utc)).total_seconds())
+        return entry
+    
+    async def set(
+        self,
+        key: str,
+        challenge_id: int,
+        ai_output: str,
+        scores: EvaluationScore,
+        suggestions: List[ImprovementSuggestion]
+    ):
+        """Store a result in memory and, if enabled, in the backing table."""
+        result_cache.set(key, (ai_output, scores, suggestions))
+        
+        if not settings.EVALUATION_CACHE_PERSISTENT:
+            return
+        
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.EVALUATION_CACHE_TTL_SECONDS)
+        try:
+            query = self.supabase.table("evaluation_cache")\
+                .upsert({
+                    "cache_key": key,
+                    "challenge_id": challenge_id,
+                    "ai_output": ai_output,
+                    "scores": scores.dict(),
+                    "suggestions": [s.dict() for s in suggestions],
+                    "expires_at": expires_at.isoformat()
+                })
+            await run_blocking(query.execute)
+        except Exception as e:
+            # Caching is best effort; the evaluation itself already succeeded
+            logger.warning(f"Evaluation cache write failed: {str(e)}")
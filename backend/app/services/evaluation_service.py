@@ -1,24 +1,92 @@
-import httpx
+import asyncio
+import base64
+import binascii
 import json
-from supabase import create_client, Client
+from supabase import Client
 from app.core.config import settings
+from app.core.database import get_supabase
+from app.core.singleflight import SingleFlight
 from app.models.schemas import (
-    EvaluationResult, EvaluationScore, ImprovementSuggestion
+    BatchEvaluationItem, Challenge, EvaluationHistoryPage, EvaluationResult, EvaluationScore,
+    EvaluationSummary,
+    ImprovementSuggestion, PromptSubmission
+)
+from app.repositories.evaluation_repository import (
+    ALL_COLUMNS, SUMMARY_COLUMNS, EvaluationRepository
 )
 from app.services.auth_service import AuthService
 from app.services.challenge_service import ChallengeService
-from typing import List, Optional
+from app.services.evaluation_cache import EvaluationCache
+from app.services.llm_providers import LLMRouter, llm_router
+from app.services.prescorer import prompt_prescorer
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
 from datetime import datetime
+import hashlib
+
+
+RUBRIC_CRITERIA = """Evaluation Criteria (each worth 2 points):
+1. Clarity – The prompt should be easy to understand in one reading. (0 = fails, 1 = partial, 2 = fully meets)
+2. Purpose – The prompt should clearly state the goal or expected result. (0 = fails, 1 = partial, 2 = fully meets)
+3. Structure – The prompt should have organized instructions, formatting, steps, or bullet points when needed. (0 = fails, 1 = partial, 2 = fully meets)
+4. Completeness – The prompt should include enough detail for a useful, high-quality response. (0 = fails, 1 = partial, 2 = fully meets)
+5. Language Quality – The prompt should be readable, grammatically correct, and free of confusing wording. (0 = fails, 1 = partial, 2 = fully meets)"""
+
+# Bump whenever the rubric or prompts change so cached results are not reused
+RUBRIC_VERSION = "1"
+
+RUBRIC_KEYS = ["clarity", "purpose", "structure", "completeness", "language_quality"]
+
+# Stored as the AI output when the pre-scorer skips the LLM for a trivial prompt
+PRESCORED_AI_OUTPUT = (
+    "This prompt is too short or vague for the AI to produce a useful response. "
+    "Add more detail about the task and try again."
+)
+
+# Identical evaluations in flight at the same time share one set of LLM calls
+evaluation_flight = SingleFlight()
+
+
+async def _gather_or_cancel(*aws):
+    """Run awaitables concurrently; on the first failure cancel the rest and re-raise."""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def _encode_history_cursor(row: dict) -> str:
+    """Opaque cursor pointing just past `row` in (created_at, id) order."""
+    raw = f"{row['created_at']}|{row['id']}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Parse a cursor from _encode_history_cursor. Raises ValueError if it is malformed."""
+    try:
+        created_at, evaluation_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(evaluation_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid history cursor")
 
 
 class EvaluationService:
-    def __init__(self):
-        self.supabase: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_KEY
-        )
-        self.auth_service = AuthService()
-        self.challenge_service = ChallengeService()
+    def __init__(
+        self,
+        llm: Optional[LLMRouter] = None,
+        supabase: Optional[Client] = None,
+        auth_service: Optional[AuthService] = None,
+        challenge_service: Optional[ChallengeService] = None
+    ):
+        self.supabase: Client = supabase or get_supabase()
+        self.auth_service = auth_service or AuthService(self.supabase)
+        self.challenge_service = challenge_service or ChallengeService(self.supabase)
+        self.evaluations = EvaluationRepository(self.supabase)
+        self.cache = EvaluationCache(self.supabase)
+        self.llm = llm or llm_router
     
     async def evaluate_prompt(
         self,
@@ -28,96 +96,463 @@ class EvaluationService:
     ) -> EvaluationResult:
         """Evaluate a user's prompt and provide scores with suggestions."""
         try:
-            # Get user
-            user = await self.auth_service.get_user(user_token)
+            # User and challenge lookups are independent
+            user, challenge = await _gather_or_cancel(
+                self.auth_service.get_user(user_token),
+                self.challenge_service.get_challenge_by_id(challenge_id)
+            )
+            if not challenge:
+                raise Exception("Challenge not found")
             
-            # Get challenge
+            ai_output, scores, suggestions = await self._run_llm_stages(user_prompt, challenge)
+            
+            return await self._save_evaluation(
+                user.id, challenge_id, user_prompt, ai_output, scores, suggestions
+            )
+        except Exception as e:
+            raise Exception(f"Evaluation failed: {str(e)}")
+    
+    async def evaluate_for_user(
+        self,
+        user_id: str,
+        challenge_id: int,
+        user_prompt: str
+    ) -> EvaluationResult:
+        """Evaluate a prompt on behalf of an already authenticated user (used by job workers)."""
+        try:
             challenge = await self.challenge_service.get_challenge_by_id(challenge_id)
             if not challenge:
                 raise Exception("Challenge not found")
             
-            # Generate AI output using user's prompt
-            ai_output = await self._generate_ai_response(user_prompt, challenge.goal)
+            ai_output, scores, suggestions = await self._run_llm_stages(user_prompt, challenge)
+            
+            return await self._save_evaluation(
+                user_id, challenge_id, user_prompt, ai_output, scores, suggestions
+            )
+        except Exception as e:
+            raise Exception(f"Evaluation failed: {str(e)}")
+    
+    async def evaluate_batch(
+        self,
+        user_token: str,
+        submissions: List[PromptSubmission]
+    ) -> List[BatchEvaluationItem]:
+        """
+        Evaluate many prompts for one user.
+        
+        The user and every referenced challenge are resolved once, the LLM
+        work fans out under EVALUATION_BATCH_CONCURRENCY, and rows are written
+        with bulk inserts. Results come back in submission order; failures are
+        reported per item instead of failing the whole batch.
+        """
+        try:
+            user = await self.auth_service.get_user(user_token)
+            challenges = await self.challenge_service.get_challenges_by_ids(
+                list({s.challenge_id for s in submissions})
+            )
+        except Exception as e:
+            raise Exception(f"Batch evaluation failed: {str(e)}")
+        
+        items = [BatchEvaluationItem(index=i) for i in range(len(submissions))]
+        semaphore = asyncio.Semaphore(max(settings.EVALUATION_BATCH_CONCURRENCY, 1))
+        
+        async def run(index: int, submission: PromptSubmission):
+            challenge = challenges.get(submission.challenge_id)
+            if not challenge:
+                items[index].error = "Challenge not found"
+                return None
+            try:
+                async with semaphore:
+                    stages = await self._run_llm_stages(submission.user_prompt, challenge)
+                return index, stages
+            except Exception as e:
+                items[index].error = f"Evaluation failed: {str(e)}"
+                return None
+        
+        completed = [
+            done for done in await asyncio.gather(
+                *(run(i, s) for i, s in enumerate(submissions))
+            ) if done is not None
+        ]
+        
+        chunk_size = max(settings.EVALUATION_BATCH_INSERT_SIZE, 1)
+        for start in range(0, len(completed), chunk_size):
+            chunk = completed[start:start + chunk_size]
+            rows = [
+                self._evaluation_row(
+                    user.id,
+                    submissions[index].challenge_id,
+                    submissions[index].user_prompt,
+                    ai_output,
+                    scores,
+                    suggestions
+                )
+                for index, (ai_output, scores, suggestions) in chunk
+            ]
+            
+            try:
+                saved_rows = await self.evaluations.insert_many(rows)
+            except Exception as e:
+                for index, _ in chunk:
+                    items[index].error = f"Failed to save evaluation: {str(e)}"
+                continue
+            
+            # PostgREST returns inserted rows in request order
+            for (index, (ai_output, scores, suggestions)), saved in zip(chunk, saved_rows):
+                items[index].result = EvaluationResult(
+                    id=saved["id"],
+                    user_id=user.id,
+                    challenge_id=submissions[index].challenge_id,
+                    user_prompt=submissions[index].user_prompt,
+                    ai_output=ai_output,
+                    scores=scores,
+                    suggestions=suggestions,
+                    created_at=datetime.fromisoformat(saved["created_at"]) if saved.get("created_at") else datetime.now()
+                )
+        
+        return items
+    
+    async def _run_llm_stages(
+        self,
+        user_prompt: str,
+        challenge: Challenge
+    ) -> Tuple[str, EvaluationScore, List[ImprovementSuggestion]]:
+        """
+        Produce the AI output, scores and suggestions, reusing cached results.
+        
+        Concurrent calls for the same cache key share a single computation;
+        each caller still saves its own evaluations row.
+        """
+        cache_key = self._cache_key(challenge.id, user_prompt)
+        precomputed = await self._precomputed_result(user_prompt, challenge, cache_key)
+        if precomputed is not None:
+            return precomputed
+        
+        async def compute():
+            # Generating the AI output doesn't depend on scoring, so it runs
+            # alongside the scores -> suggestions chain
+            (ai_output, output_degraded), stages = await _gather_or_cancel(
+                self._generate_ai_response(user_prompt, challenge.goal),
+                self._score_and_suggest(user_prompt, challenge)
+            )
+            scores, suggestions, suggestions_degraded = stages
+            await self._cache_result(
+                cache_key, challenge.id, ai_output, scores, suggestions,
+                degraded=output_degraded or suggestions_degraded
+            )
+            return ai_output, scores, suggestions
+        
+        if cache_key is None:
+            return await compute()
+        return await evaluation_flight.do(cache_key, compute)
+    
+    async def _precomputed_result(
+        self,
+        user_prompt: str,
+        challenge: Challenge,
+        cache_key: Optional[str]
+    ) -> Optional[Tuple[str, EvaluationScore, List[ImprovementSuggestion]]]:
+        """Answer without the LLM: floor-level prompts from the pre-scorer, then the cache."""
+        if settings.PRESCORER_ENABLED:
+            llm_calls = 2 if settings.EVALUATION_MODE == "combined" else 3
+            prescore = prompt_prescorer.floor_score(user_prompt, challenge.goal, llm_calls)
+            if prescore is not None:
+                return (
+                    PRESCORED_AI_OUTPUT,
+                    self._parse_rubric_scores(prescore.criteria),
+                    prompt_prescorer.suggestions(prescore)
+                )
+        
+        if settings.EVALUATION_CACHE_ENABLED and cache_key is not None:
+            return await self.cache.get(cache_key)
+        return None
+    
+    def _cache_key(self, challenge_id: int, user_prompt: str) -> Optional[str]:
+        """
+        Content address of an evaluation: everything that affects the LLM output.
+        
+        Keyed by the models the backends actually serve. None (don't cache)
+        when backends override a model differently, as the result would
+        depend on which backend the router picks.
+        """
+        output_model = self.llm.model_for(settings.DEFAULT_MODEL)
+        evaluation_model = self.llm.model_for(settings.EVALUATION_MODEL)
+        if output_model is None or evaluation_model is None:
+            return None
+        
+        normalized_prompt = " ".join(user_prompt.split())
+        prompt_hash = hashlib.sha256(normalized_prompt.encode("utf-8")).hexdigest()
+        key_material = "|".join([
+            str(challenge_id),
+            prompt_hash,
+            output_model,
+            evaluation_model,
+            settings.EVALUATION_MODE,
+            RUBRIC_VERSION
+        ])
+        return hashlib.sha256(key_material.encode("utf-8")).hexdigest()
+    
+    async def _cache_result(
+        self,
+        cache_key: Optional[str],
+        challenge_id: int,
+        ai_output: str,
+        scores: EvaluationScore,
+        suggestions: List[ImprovementSuggestion],
+        degraded: bool = False
+    ):
+        """
+        Cache a freshly computed result.
+        
+        Degraded results (an error message as the AI output, or fallback
+        suggestions after an LLM failure) are not cached, so a transient
+        failure doesn't stick to every identical submission for the TTL.
+        """
+        if not settings.EVALUATION_CACHE_ENABLED or degraded or cache_key is None:
+            return
+        await self.cache.set(cache_key, challenge_id, ai_output, scores, suggestions)
+    
+    async def evaluate_prompt_stream(
+        self,
+        user_token: str,
+        challenge_id: int,
+        user_prompt: str
+    ) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Evaluate a prompt, yielding (event, data) pairs as each stage completes.
+        
+        Emits "token" events while the AI output streams in, "scores" and
+        "suggestions" once each is ready, then "saved" with the stored row id.
+        """
+        user, challenge = await _gather_or_cancel(
+            self.auth_service.get_user(user_token),
+            self.challenge_service.get_challenge_by_id(challenge_id)
+        )
+        if not challenge:
+            raise Exception("Challenge not found")
+        
+        cache_key = self._cache_key(challenge_id, user_prompt)
+        precomputed = await self._precomputed_result(user_prompt, challenge, cache_key)
+        if precomputed is not None:
+            ai_output, scores, suggestions = precomputed
+            yield "token", {"content": ai_output}
+            yield "scores", scores.dict()
+            yield "suggestions", [s.dict() for s in suggestions]
+            result = await self._save_evaluation(
+                user.id, challenge_id, user_prompt, ai_output, scores, suggestions
+            )
+            yield "saved", {"id": result.id, "created_at": result.created_at.isoformat()}
+            return
+        
+        events: asyncio.Queue = asyncio.Queue()
+        
+        async def generate() -> Tuple[str, bool]:
+            chunks = []
+            degraded = False
+            async for token, is_error in self._stream_ai_response(user_prompt, challenge.goal):
+                chunks.append(token)
+                degraded = degraded or is_error
+                await events.put(("token", {"content": token}))
+            return "".join(chunks), degraded
+        
+        async def on_stage(stage: str, value):
+            if stage == "scores":
+                await events.put(("scores", value.dict()))
+            else:
+                await events.put(("suggestions", [s.dict() for s in value]))
+        
+        tasks = [
+            asyncio.ensure_future(generate()),
+            asyncio.ensure_future(self._score_and_suggest(user_prompt, challenge, on_stage))
+        ]
+        try:
+            while not (events.empty() and all(t.done() for t in tasks)):
+                getter = asyncio.ensure_future(events.get())
+                await asyncio.wait(
+                    [getter] + [t for t in tasks if not t.done()],
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if getter.done():
+                    yield getter.result()
+                else:
+                    getter.cancel()
+                
+                for task in tasks:
+                    if task.done() and task.exception():
+                        raise task.exception()
             
-            # Evaluate the prompt
+            ai_output, output_degraded = tasks[0].result()
+            scores, suggestions, suggestions_degraded = tasks[1].result()
+        finally:
+            # Client disconnects or stage failures stop any remaining LLM work
+            for task in tasks:
+                task.cancel()
+        
+        await self._cache_result(
+            cache_key, challenge_id, ai_output, scores, suggestions,
+            degraded=output_degraded or suggestions_degraded
+        )
+        result = await self._save_evaluation(
+            user.id, challenge_id, user_prompt, ai_output, scores, suggestions
+        )
+        yield "saved", {"id": result.id, "created_at": result.created_at.isoformat()}
+    
+    async def _save_evaluation(
+        self,
+        user_id: str,
+        challenge_id: int,
+        user_prompt: str,
+        ai_output: str,
+        scores: EvaluationScore,
+        suggestions: List[ImprovementSuggestion]
+    ) -> EvaluationResult:
+        """Store an evaluation in the database."""
+        evaluation_data = self._evaluation_row(
+            user_id, challenge_id, user_prompt, ai_output, scores, suggestions
+        )
+        
+        saved = await self.evaluations.insert(evaluation_data)
+        
+        return EvaluationResult(
+            id=saved["id"],
+            user_id=user_id,
+            challenge_id=challenge_id,
+            user_prompt=user_prompt,
+            ai_output=ai_output,
+            scores=scores,
+            suggestions=suggestions,
+            created_at=datetime.now()
+        )
+    
+    def _evaluation_row(
+        self,
+        user_id: str,
+        challenge_id: int,
+        user_prompt: str,
+        ai_output: str,
+        scores: EvaluationScore,
+        suggestions: List[ImprovementSuggestion]
+    ) -> dict:
+        """Build an evaluations table row."""
+        return {
+            "user_id": user_id,
+            "challenge_id": challenge_id,
+            "user_prompt": user_prompt,
+            "ai_output": ai_output,
+            "clarity_score": scores.clarity,
+            "specificity_score": scores.specificity,
+            "creativity_score": scores.creativity,
+            "relevance_score": scores.relevance,
+            "overall_score": scores.overall,
+            "suggestions": [s.dict() for s in suggestions]
+        }
+    
+    async def _score_and_suggest(
+        self,
+        user_prompt: str,
+        challenge: Challenge,
+        on_stage: Optional[Callable[[str, object], Awaitable[None]]] = None
+    ) -> Tuple[EvaluationScore, List[ImprovementSuggestion], bool]:
+        """
+        Score the prompt and generate suggestions (one LLM call in combined mode).
+        
+        The flag is True when the suggestions are the generic fallback.
+        If given, on_stage is awaited with ("scores", scores) and
+        ("suggestions", suggestions) as each becomes available.
+        """
+        if settings.EVALUATION_MODE == "combined":
+            scores, suggestions, degraded = await self._evaluate_and_suggest(
+                user_prompt, challenge.goal, challenge.example_prompt
+            )
+            if on_stage:
+                await on_stage("scores", scores)
+        else:
             scores = await self._evaluate_prompt_quality(
                 user_prompt, challenge.goal, challenge.example_prompt
             )
-            
-            # Generate improvement suggestions
-            suggestions = await self._generate_suggestions(
+            if on_stage:
+                await on_stage("scores", scores)
+            suggestions, degraded = await self._generate_suggestions(
                 user_prompt, challenge.goal, scores
             )
+        
+        if on_stage:
+            await on_stage("suggestions", suggestions)
+        return scores, suggestions, degraded
+    
+    async def _generate_ai_response(self, user_prompt: str, goal: str) -> Tuple[str, bool]:
+        """Generate AI response using the configured LLM backend. The flag is True for an error message."""
+        try:
+            response = await self.llm.chat({
+                "model": settings.DEFAULT_MODEL,
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": f"You are helping with this task: {goal}"
+                    },
+                    {
+                        "role": "user",
+                        "content": user_prompt
+                    }
+                ]
+            })
             
-            # Store evaluation in database
-            evaluation_data = {
-                "user_id": user.id,
-                "challenge_id": challenge_id,
-                "user_prompt": user_prompt,
-                "ai_output": ai_output,
-                "clarity_score": scores.clarity,
-                "specificity_score": scores.specificity,
-                "creativity_score": scores.creativity,
-                "relevance_score": scores.relevance,
-                "overall_score": scores.overall,
-                "suggestions": [s.dict() for s in suggestions]
-            }
-            
-            response = self.supabase.table("evaluations")\
-                .insert(evaluation_data)\
-                .execute()
+            if response.status_code != 200:
+                error_text = response.text
+                print(f"[LLM ERROR] Status {response.status_code}: {error_text}")
+                return f"Error generating response: API returned {response.status_code}", True
             
-            return EvaluationResult(
-                id=response.data[0]["id"],
-                user_id=user.id,
-                challenge_id=challenge_id,
-                user_prompt=user_prompt,
-                ai_output=ai_output,
-                scores=scores,
-                suggestions=suggestions,
-                created_at=datetime.now()
-            )
+            result = response.json()
+            content = result["choices"][0]["message"]["content"]
+            print(f"[LLM SUCCESS] Generated AI response ({len(content)} chars)")
+            return content, False
         except Exception as e:
-            raise Exception(f"Evaluation failed: {str(e)}")
+            print(f"Exception in _generate_ai_response: {str(e)}")
+            return f"Error generating response: {str(e)}", True
     
-    async def _generate_ai_response(self, user_prompt: str, goal: str) -> str:
-        """Generate AI response using Groq API."""
+    async def _stream_ai_response(self, user_prompt: str, goal: str) -> AsyncIterator[Tuple[str, bool]]:
+        """
+        Stream the AI response token by token from the fastest LLM backend.
+        
+        Yields (text, is_error) pairs; an error message ends the stream.
+        """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://api.groq.com/openai/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {settings.GROQ_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": settings.DEFAULT_MODEL,
-                        "messages": [
-                            {
-                                "role": "system",
-                                "content": f"You are helping with this task: {goal}"
-                            },
-                            {
-                                "role": "user",
-                                "content": user_prompt
-                            }
-                        ]
+            payload = {
+                "model": settings.DEFAULT_MODEL,
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": f"You are helping with this task: {goal}"
                     },
-                    timeout=30.0
-                )
-                
+                    {
+                        "role": "user",
+                        "content": user_prompt
+                    }
+                ]
+            }
+            
+            async with self.llm.stream(payload) as response:
                 if response.status_code != 200:
-                    error_text = response.text
-                    print(f"[GROQ ERROR] Status {response.status_code}: {error_text}")
-                    return f"Error generating response: API returned {response.status_code}"
+                    error_text = (await response.aread()).decode("utf-8", errors="replace")
+                    print(f"[LLM ERROR - STREAM] Status {response.status_code}: {error_text}")
+                    yield f"Error generating response: API returned {response.status_code}", True
+                    return
                 
-                result = response.json()
-                content = result["choices"][0]["message"]["content"]
-                print(f"[GROQ SUCCESS] Generated AI response ({len(content)} chars)")
-                return content
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    
+                    chunk = json.loads(data)
+                    choices = chunk.get("choices") or []
+                    content = choices[0].get("delta", {}).get("content") if choices else None
+                    if content:
+                        yield content, False
         except Exception as e:
-            print(f"Exception in _generate_ai_response: {str(e)}")
-            return f"Error generating response: {str(e)}"
+            print(f"Exception in _stream_ai_response: {str(e)}")
+            yield f"Error generating response: {str(e)}", True
     
     async def _evaluate_prompt_quality(
         self,
@@ -135,12 +570,7 @@ EXAMPLE PROMPT: {example_prompt}
 
 USER'S PROMPT TO EVALUATE: {user_prompt}
 
-Evaluation Criteria (each worth 2 points):
-1. Clarity – The prompt should be easy to understand in one reading. (0 = fails, 1 = partial, 2 = fully meets)
-2. Purpose – The prompt should clearly state the goal or expected result. (0 = fails, 1 = partial, 2 = fully meets)
-3. Structure – The prompt should have organized instructions, formatting, steps, or bullet points when needed. (0 = fails, 1 = partial, 2 = fully meets)
-4. Completeness – The prompt should include enough detail for a useful, high-quality response. (0 = fails, 1 = partial, 2 = fully meets)
-5. Language Quality – The prompt should be readable, grammatically correct, and free of confusing wording. (0 = fails, 1 = partial, 2 = fully meets)
+{RUBRIC_CRITERIA}
 
 Think through each criterion step by step, then respond with ONLY valid JSON in this exact format:
 {{
@@ -160,69 +590,36 @@ Think through each criterion step by step, then respond with ONLY valid JSON in
 
 Scores must be integers: 0, 1, or 2 only."""
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://api.groq.com/openai/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {settings.GROQ_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": settings.EVALUATION_MODEL,
-                        "messages": [
-                            {
-                                "role": "user",
-                                "content": evaluation_prompt
-                            }
-                        ],
-                        "temperature": 0.3
-                    },
-                    timeout=30.0
-                )
-                
-                if response.status_code != 200:
-                    error_text = response.text
-                    error_msg = f"Groq API returned {response.status_code}: {error_text}"
-                    print(f"[GROQ ERROR - EVALUATION] {error_msg}")
-                    raise Exception(error_msg)
-                
-                result = response.json()
-                scores_text = result["choices"][0]["message"]["content"]
-                
-                print(f"[GROQ RAW EVALUATION]:\n{scores_text}")
-                
-                # Extract JSON from response
-                try:
-                    scores_json = json.loads(scores_text)
-                except json.JSONDecodeError as je:
-                    print(f"[JSON PARSE ERROR] Could not parse: {scores_text}")
-                    raise Exception(f"Invalid JSON from Groq: {str(je)}")
-                
-                # Validate all required keys exist
-                required_keys = ["clarity", "purpose", "structure", "completeness", "language_quality"]
-                missing_keys = [k for k in required_keys if k not in scores_json]
-                if missing_keys:
-                    raise Exception(f"Missing keys in Groq response: {missing_keys}")
-                
-                # Calculate overall score (sum of all criteria, max 10)
-                overall = (
-                    scores_json["clarity"] + 
-                    scores_json["purpose"] + 
-                    scores_json["structure"] + 
-                    scores_json["completeness"] + 
-                    scores_json["language_quality"]
-                )
-                
-                print(f"[SCORES] Clarity:{scores_json['clarity']} Purpose:{scores_json['purpose']} Structure:{scores_json['structure']} Completeness:{scores_json['completeness']} Language:{scores_json['language_quality']} | Total:{overall}/10")
-                
-                # Map to 0-10 scale for storage (keeping backward compatibility)
-                return EvaluationScore(
-                    clarity=scores_json["clarity"] * 5.0,  # 0-2 -> 0-10
-                    specificity=scores_json["completeness"] * 5.0,
-                    creativity=scores_json["structure"] * 5.0,
-                    relevance=scores_json["purpose"] * 5.0,
-                    overall=float(overall)  # Keep 0-10 scale
-                )
+            response = await self.llm.chat({
+                "model": settings.EVALUATION_MODEL,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": evaluation_prompt
+                    }
+                ],
+                "temperature": 0.3
+            })
+            
+            if response.status_code != 200:
+                error_text = response.text
+                error_msg = f"LLM API returned {response.status_code}: {error_text}"
+                print(f"[LLM ERROR - EVALUATION] {error_msg}")
+                raise Exception(error_msg)
+            
+            result = response.json()
+            scores_text = result["choices"][0]["message"]["content"]
+            
+            print(f"[LLM RAW EVALUATION]:\n{scores_text}")
+            
+            # Extract JSON from response
+            try:
+                scores_json = json.loads(scores_text)
+            except json.JSONDecodeError as je:
+                print(f"[JSON PARSE ERROR] Could not parse: {scores_text}")
+                raise Exception(f"Invalid JSON from LLM: {str(je)}")
+            
+            return self._parse_rubric_scores(scores_json)
         except Exception as e:
             print(f"[EVALUATION ERROR] Exception in _evaluate_prompt_quality: {str(e)}")
             import traceback
@@ -235,8 +632,12 @@ Scores must be integers: 0, 1, or 2 only."""
         user_prompt: str,
         goal: str,
         scores: EvaluationScore
-    ) -> List[ImprovementSuggestion]:
-        """Generate specific improvement suggestions based on 5-criteria evaluation."""
+    ) -> Tuple[List[ImprovementSuggestion], bool]:
+        """
+        Generate specific improvement suggestions based on 5-criteria evaluation.
+        
+        The flag is True when the LLM failed and generic suggestions were used.
+        """
         try:
             # Convert scores back to 0-2 scale for analysis
             clarity_raw = int(scores.clarity / 5.0)
@@ -278,115 +679,231 @@ Respond ONLY with valid JSON in this exact format:
 Valid categories: clarity, purpose, structure, completeness, language, general
 Valid priorities: high, medium, low"""
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://api.groq.com/openai/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {settings.GROQ_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": settings.EVALUATION_MODEL,
-                        "messages": [
-                            {
-                                "role": "user",
-                                "content": suggestion_prompt
-                            }
-                        ],
-                        "temperature": 0.7
-                    },
-                    timeout=30.0
-                )
-                
-                if response.status_code != 200:
-                    error_text = response.text
-                    print(f"[GROQ ERROR - SUGGESTIONS] Status {response.status_code}: {error_text}")
-                    # Use generic suggestions as fallback (non-critical feature)
-                    return [
-                        ImprovementSuggestion(
-                            category="general",
-                            suggestion="Be more specific about the expected output format",
-                            priority="medium"
-                        ),
-                        ImprovementSuggestion(
-                            category="general",
-                            suggestion="Add context about the target audience or use case",
-                            priority="medium"
-                        )
-                    ]
-                
-                result = response.json()
-                suggestions_text = result["choices"][0]["message"]["content"]
-                
-                print(f"[GROQ RAW SUGGESTIONS]:\n{suggestions_text}")
-                
-                # Extract JSON from response
-                suggestions_json = json.loads(suggestions_text)
-                
-                return [ImprovementSuggestion(**s) for s in suggestions_json]
+            response = await self.llm.chat({
+                "model": settings.EVALUATION_MODEL,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": suggestion_prompt
+                    }
+                ],
+                "temperature": 0.7
+            })
+            
+            if response.status_code != 200:
+                error_text = response.text
+                print(f"[LLM ERROR - SUGGESTIONS] Status {response.status_code}: {error_text}")
+                # Use generic suggestions as fallback (non-critical feature)
+                return self._fallback_suggestions(), True
+            
+            result = response.json()
+            suggestions_text = result["choices"][0]["message"]["content"]
+            
+            print(f"[LLM RAW SUGGESTIONS]:\n{suggestions_text}")
+            
+            # Extract JSON from response
+            suggestions_json = json.loads(suggestions_text)
+            
+            return [ImprovementSuggestion(**s) for s in suggestions_json], False
         except Exception as e:
             print(f"[SUGGESTIONS ERROR] Exception in _generate_suggestions: {str(e)}")
             import traceback
             traceback.print_exc()
             # Fallback to generic suggestions (non-critical feature)
-            return [
-                ImprovementSuggestion(
-                    category="general",
-                    suggestion="Be more specific about the expected output format",
-                    priority="medium"
-                ),
-                ImprovementSuggestion(
-                    category="general",
-                    suggestion="Add context about the target audience or use case",
-                    priority="medium"
-                )
-            ]
+            return self._fallback_suggestions(), True
+    
+    async def _evaluate_and_suggest(
+        self,
+        user_prompt: str,
+        goal: str,
+        example_prompt: str
+    ) -> Tuple[EvaluationScore, List[ImprovementSuggestion], bool]:
+        """
+        Score the prompt and generate suggestions in a single structured request.
+        
+        The flag is True when the suggestions were missing or malformed and
+        generic ones were used.
+        """
+        try:
+            combined_prompt = f"""You are a strict and consistent Prompt Quality Evaluator. Your job is to rate the given prompt on a scale from 1 to 10 based on five criteria, then suggest how to improve it. You must think through each criterion step by step before giving a final score.
+
+CHALLENGE GOAL: {goal}
+
+EXAMPLE PROMPT: {example_prompt}
+
+USER'S PROMPT TO EVALUATE: {user_prompt}
+
+{RUBRIC_CRITERIA}
+
+After scoring, provide 3-5 specific, actionable suggestions to improve this prompt. Focus on the lowest-scoring criteria.
+
+Think through each criterion step by step, then respond with ONLY valid JSON in this exact format:
+{{
+    "clarity": 2,
+    "purpose": 1,
+    "structure": 2,
+    "completeness": 1,
+    "language_quality": 2,
+    "reasoning": {{
+        "clarity": "Brief explanation of clarity score",
+        "purpose": "Brief explanation of purpose score",
+        "structure": "Brief explanation of structure score",
+        "completeness": "Brief explanation of completeness score",
+        "language_quality": "Brief explanation of language quality score"
+    }},
+    "suggestions": [
+        {{
+            "category": "purpose",
+            "suggestion": "Clearly state what output format or result you expect",
+            "priority": "high"
+        }}
+    ]
+}}
+
+Scores must be integers: 0, 1, or 2 only.
+Valid suggestion categories: clarity, purpose, structure, completeness, language, general
+Valid priorities: high, medium, low"""
+
+            response = await self.llm.chat({
+                "model": settings.EVALUATION_MODEL,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": combined_prompt
+                    }
+                ],
+                "temperature": 0.3,
+                "response_format": {"type": "json_object"}
+            })
+            
+            if response.status_code != 200:
+                error_text = response.text
+                error_msg = f"LLM API returned {response.status_code}: {error_text}"
+                print(f"[LLM ERROR - COMBINED EVALUATION] {error_msg}")
+                raise Exception(error_msg)
+            
+            result = response.json()
+            combined_text = result["choices"][0]["message"]["content"]
+            
+            print(f"[LLM RAW COMBINED EVALUATION]:\n{combined_text}")
+            
+            try:
+                combined_json = json.loads(combined_text)
+            except json.JSONDecodeError as je:
+                print(f"[JSON PARSE ERROR] Could not parse: {combined_text}")
+                raise Exception(f"Invalid JSON from LLM: {str(je)}")
+            
+            scores = self._parse_rubric_scores(combined_json)
+            
+            # Suggestions are non-critical, so a malformed list falls back to generic ones
+            try:
+                suggestions = [
+                    ImprovementSuggestion(**s) for s in combined_json.get("suggestions") or []
+                ]
+            except Exception as se:
+                print(f"[SUGGESTIONS ERROR] Malformed suggestions in combined response: {str(se)}")
+                suggestions = []
+            
+            if not suggestions:
+                return scores, self._fallback_suggestions(), True
+            return scores, suggestions, False
+        except Exception as e:
+            print(f"[EVALUATION ERROR] Exception in _evaluate_and_suggest: {str(e)}")
+            # Re-raise to surface the actual error instead of hiding it
+            raise Exception(f"Prompt evaluation failed: {str(e)}")
+    
+    def _parse_rubric_scores(self, scores_json: dict) -> EvaluationScore:
+        """Convert raw 0-2 rubric scores into an EvaluationScore."""
+        # Validate all required keys exist
+        missing_keys = [k for k in RUBRIC_KEYS if k not in scores_json]
+        if missing_keys:
+            raise Exception(f"Missing keys in LLM response: {missing_keys}")
+        
+        # Calculate overall score (sum of all criteria, max 10)
+        overall = (
+            scores_json["clarity"] + 
+            scores_json["purpose"] + 
+            scores_json["structure"] + 
+            scores_json["completeness"] + 
+            scores_json["language_quality"]
+        )
+        
+        print(f"[SCORES] Clarity:{scores_json['clarity']} Purpose:{scores_json['purpose']} Structure:{scores_json['structure']} Completeness:{scores_json['completeness']} Language:{scores_json['language_quality']} | Total:{overall}/10")
+        
+        # Map to 0-10 scale for storage (keeping backward compatibility)
+        return EvaluationScore(
+            clarity=scores_json["clarity"] * 5.0,  # 0-2 -> 0-10
+            specificity=scores_json["completeness"] * 5.0,
+            creativity=scores_json["structure"] * 5.0,
+            relevance=scores_json["purpose"] * 5.0,
+            overall=float(overall)  # Keep 0-10 scale
+        )
+    
+    def _fallback_suggestions(self) -> List[ImprovementSuggestion]:
+        """Generic suggestions used when the suggestion stage fails (non-critical feature)."""
+        return [
+            ImprovementSuggestion(
+                category="general",
+                suggestion="Be more specific about the expected output format",
+                priority="medium"
+            ),
+            ImprovementSuggestion(
+                category="general",
+                suggestion="Add context about the target audience or use case",
+                priority="medium"
+            )
+        ]
     
     async def get_user_history(
         self,
         user_token: str,
         limit: int = 10,
-        offset: int = 0,
-        challenge_id: Optional[int] = None
-    ) -> List[EvaluationResult]:
-        """Get user's evaluation history."""
+        cursor: Optional[str] = None,
+        challenge_id: Optional[int] = None,
+        summary: bool = False
+    ) -> EvaluationHistoryPage:
+        """
+        Get a page of the user's evaluation history, newest first.
+        
+        Pass the returned next_cursor back as `cursor` for the following page.
+        With summary=True only ids, challenge, scores and timestamps are read;
+        the full text is fetched per evaluation with get_evaluation_by_id.
+        Raises ValueError for a malformed cursor.
+        """
+        before = _decode_history_cursor(cursor) if cursor else None
+        
         try:
             user = await self.auth_service.get_user(user_token)
             
-            query = self.supabase.table("evaluations")\
-                .select("*")\
-                .eq("user_id", user.id)\
-                .order("created_at", desc=True)\
-                .limit(limit)\
-                .offset(offset)
-            
-            if challenge_id:
-                query = query.eq("challenge_id", challenge_id)
-            
-            response = query.execute()
-            
-            results = []
-            for eval_data in response.data:
-                results.append(EvaluationResult(
-                    id=eval_data["id"],
-                    user_id=eval_data["user_id"],
-                    challenge_id=eval_data["challenge_id"],
-                    user_prompt=eval_data["user_prompt"],
-                    ai_output=eval_data["ai_output"],
-                    scores=EvaluationScore(
-                        clarity=eval_data["clarity_score"],
-                        specificity=eval_data["specificity_score"],
-                        creativity=eval_data["creativity_score"],
-                        relevance=eval_data["relevance_score"],
-                        overall=eval_data["overall_score"]
-                    ),
-                    suggestions=[
-                        ImprovementSuggestion(**s) for s in eval_data["suggestions"]
-                    ],
-                    created_at=datetime.fromisoformat(eval_data["created_at"])
-                ))
-            
-            return results
+            # One extra row tells whether there is a next page
+            rows = await self.evaluations.list_for_user(
+                user.id,
+                limit=limit + 1,
+                before=before,
+                challenge_id=challenge_id,
+                columns=SUMMARY_COLUMNS if summary else ALL_COLUMNS
+            )
+            
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = _encode_history_cursor(rows[-1])
+            
+            if summary:
+                items = [
+                    EvaluationSummary(
+                        id=eval_data["id"],
+                        user_id=eval_data["user_id"],
+                        challenge_id=eval_data["challenge_id"],
+                        scores=self._scores_from_row(eval_data),
+                        created_at=datetime.fromisoformat(eval_data["created_at"])
+                    )
+                    for eval_data in rows
+                ]
+            else:
+                items = [self._result_from_row(eval_data) for eval_data in rows]
+            
+            return EvaluationHistoryPage(items=items, next_cursor=next_cursor)
         except Exception as e:
             raise Exception(f"Failed to fetch history: {str(e)}")
     
@@ -399,34 +916,34 @@ Valid priorities: high, medium, low"""
         try:
             user = await self.auth_service.get_user(user_token)
             
-            response = self.supabase.table("evaluations")\
-                .select("*")\
-                .eq("id", evaluation_id)\
-                .eq("user_id", user.id)\
-                .execute()
+            eval_data = await self.evaluations.get_for_user(evaluation_id, user.id)
             
-            if not response.data:
+            if not eval_data:
                 return None
             
-            eval_data = response.data[0]
-            
-            return EvaluationResult(
-                id=eval_data["id"],
-                user_id=eval_data["user_id"],
-                challenge_id=eval_data["challenge_id"],
-                user_prompt=eval_data["user_prompt"],
-                ai_output=eval_data["ai_output"],
-                scores=EvaluationScore(
-                    clarity=eval_data["clarity_score"],
-                    specificity=eval_data["specificity_score"],
-                    creativity=eval_data["creativity_score"],
-                    relevance=eval_data["relevance_score"],
-                    overall=eval_data["overall_score"]
-                ),
-                suggestions=[
-                    ImprovementSuggestion(**s) for s in eval_data["suggestions"]
-                ],
-                created_at=datetime.fromisoformat(eval_data["created_at"])
-            )
+            return self._result_from_row(eval_data)
         except Exception as e:
             raise Exception(f"Failed to fetch evaluation: {str(e)}")
+    
+    def _scores_from_row(self, eval_data: dict) -> EvaluationScore:
+        return EvaluationScore(
+            clarity=eval_data["clarity_score"],
+            specificity=eval_data["specificity_score"],
+            creativity=eval_data["creativity_score"],
+            relevance=eval_data["relevance_score"],
+            overall=eval_data["overall_score"]
+        )
+    
+    def _result_from_row(self, eval_data: dict) -> EvaluationResult:
+        return EvaluationResult(
+            id=eval_data["id"],
+            user_id=eval_data["user_id"],
+            challenge_id=eval_data["challenge_id"],
+            user_prompt=eval_data["user_prompt"],
+            ai_output=eval_data["ai_output"],
+            scores=self._scores_from_row(eval_data),
+            suggestions=[
+                ImprovementSuggestion(**s) for s in eval_data["suggestions"]
+            ],
+            created_at=datetime.fromisoformat(eval_data["created_at"])
+        )
@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from supabase import Client
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.repositories.base import run_blocking
+from app.models.schemas import EvaluationJob, EvaluationResult
+from app.services.evaluation_service import EvaluationService
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore(ABC):
+    """Where evaluation jobs and their results are kept between submit and poll."""
+
+    @abstractmethod
+    async def create(self, job: EvaluationJob, user_prompt: str):
+        ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[EvaluationJob]:
+        ...
+
+    @abstractmethod
+    async def update(self, job: EvaluationJob):
+        ...
+
+    @abstractmethod
+    async def delete(self, job_id: str):
+        ...
+
+    @abstractmethod
+    async def claim(self, job: EvaluationJob) -> Optional[EvaluationJob]:
+        """
+        Atomically mark a job as running by this process.
+
+        Returns the running job, or None if another worker or instance
+        already has it (or finished it), in which case it must be skipped.
+        """
+
+    @abstractmethod
+    async def list_unfinished(self) -> List[tuple]:
+        """Return (job, user_prompt) pairs that are queued, or running with an expired lease."""
+
+
+class InMemoryJobStore(JobStore):
+    """Process-local store. Jobs are lost on restart."""
+
+    def __init__(self):
+        self._jobs = TTLCache(
+            max_size=settings.EVALUATION_JOB_MAX_QUEUE_SIZE * 10,
+            ttl_seconds=settings.EVALUATION_JOB_RESULT_TTL_SECONDS
+        )
+
+    async def create(self, job: EvaluationJob, user_prompt: str):
+        self._jobs.set(job.id, job)
+
+    async def get(self, job_id: str) -> Optional[EvaluationJob]:
+        return self._jobs.get(job_id)
+
+    async def update(self, job: EvaluationJob):
+        self._jobs.set(job.id, job)
+
+    async def delete(self, job_id: str):
+        self._jobs.invalidate(job_id)
+
+    async def claim(self, job: EvaluationJob) -> Optional[EvaluationJob]:
+        # Only this process can see these jobs, so there is nothing to race with
+        job = job.model_copy(update={"status": "running", "updated_at": datetime.now(timezone.utc)})
+        self._jobs.set(job.id, job)
+        return job
+
+    async def list_unfinished(self) -> List[tuple]:
+        return []
+
+
+class SupabaseJobStore(JobStore):
+    """Store backed by the evaluation_jobs table, so queued jobs survive restarts."""
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+
+    async def create(self, job: EvaluationJob, user_prompt: str):
+        query = self.supabase.table("evaluation_jobs")\
+            .insert({
+                "id": job.id,
+                "user_id": job.user_id,
+                "challenge_id": job.challenge_id,
+                "user_prompt": user_prompt,
+                "status": job.status,
+                "created_at": job.created_at.isoformat(),
+                "updated_at": job.updated_at.isoformat()
+            })
+        await run_blocking(query.execute)
+
+    async def get(self, job_id: str) -> Optional[EvaluationJob]:
+        query = self.supabase.table("evaluation_jobs")\
+            .select("id, user_id, challenge_id, status, result, error, created_at, updated_at")\
+            .eq("id", job_id)
+        response = await run_blocking(query.execute)
+
+        if not response.data:
+            return None
+
+        return self._to_job(response.data[0])
+
+    async def update(self, job: EvaluationJob):
+        query = self.supabase.table("evaluation_jobs")\
+            .update({
+                "status": job.status,
+                "result": job.result.model_dump(mode="json") if job.result else None,
+                "error": job.error,
+                "updated_at": job.updated_at.isoformat()
+            })\
+            .eq("id", job.id)
+        await run_blocking(query.execute)
+
+    async def delete(self, job_id: str):
+        query = self.supabase.table("evaluation_jobs")\
+            .delete()\
+            .eq("id", job_id)
+        await run_blocking(query.execute)
+
+    async def claim(self, job: EvaluationJob) -> Optional[EvaluationJob]:
+        now = datetime.now(timezone.utc)
+        # The status (and lease) condition makes this a compare-and-set: of
+        # several instances claiming the same job, only one gets a row back
+        query = self.supabase.table("evaluation_jobs")\
+            .update({"status": "running", "updated_at": now.isoformat()})\
+            .eq("id", job.id)
+        if job.status == "running":
+            query = query.eq("status", "running").lt("updated_at", self._lease_cutoff(now).isoformat())
+        else:
+            query = query.eq("status", "queued")
+        response = await run_blocking(query.execute)
+
+        if not response.data:
+            return None
+        return self._to_job(response.data[0])
+
+    async def list_unfinished(self) -> List[tuple]:
+        query = self.supabase.table("evaluation_jobs")\
+            .select("*")\
+            .in_("status", ["queued", "running"])\
+            .order("created_at", desc=False)
+        response = await run_blocking(query.execute)
+
+        # Running jobs with a live lease belong to another instance (e.g. the
+        # old one during a rolling deploy); leave them alone
+        cutoff = self._lease_cutoff(datetime.now(timezone.utc))
+        unfinished = []
+        for row in response.data or []:
+            job = self._to_job(row)
+            if job.status == "queued" or job.updated_at < cutoff:
+                unfinished.append((job, row["user_prompt"]))
+        return unfinished
+
+    @staticmethod
+    def _lease_cutoff(now: datetime) -> datetime:
+        return now - timedelta(seconds=settings.EVALUATION_JOB_LEASE_SECONDS)
+
+    def _to_job(self, row: dict) -> EvaluationJob:
+        return EvaluationJob(
+            id=str(row["id"]),
+            user_id=str(row["user_id"]),
+            challenge_id=row["challenge_id"],
+            status=row["status"],
+            result=EvaluationResult(**row["result"]) if row.get("result") else None,
+            error=row.get("error"),
+            created_at=datetime.fromisoformat(row["created_at"]),
+            updated_at=datetime.fromisoformat(row["updated_at"])
+        )
+
+
+class EvaluationJobQueue:
+    """
+    Bounded queue of evaluation jobs drained by a pool of async workers.
+
+    Submitting returns immediately with a job id; callers poll get() for
+    the status and, once completed, the EvaluationResult.
+    """
+
+    def __init__(
+        self,
+        evaluation_service: EvaluationService,
+        store: Optional[JobStore] = None,
+        concurrency: int = settings.EVALUATION_JOB_CONCURRENCY,
+        max_queue_size: int = settings.EVALUATION_JOB_MAX_QUEUE_SIZE
+    ):
+        self.evaluation_service = evaluation_service
+        self.store = store or build_job_store(evaluation_service.supabase)
+        self.concurrency = concurrency
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self):
+        """Start the worker pool, re-enqueueing jobs left unfinished by a restart."""
+        if self._workers:
+            return
+
+        try:
+            for job, user_prompt in await self.store.list_unfinished():
+                self._queue.put_nowait((job, user_prompt))
+        except asyncio.QueueFull:
+            logger.warning("Job queue full while re-enqueueing unfinished jobs")
+        except Exception as e:
+            logger.error(f"Failed to re-enqueue unfinished jobs: {str(e)}")
+
+        self._workers = [
+            asyncio.ensure_future(self._worker(i)) for i in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        """Stop the worker pool. Persisted jobs in flight are picked up on next start."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, user_id: str, challenge_id: int, user_prompt: str) -> EvaluationJob:
+        """Enqueue an evaluation. Raises asyncio.QueueFull when the queue is at capacity."""
+        if self._queue.full():
+            raise asyncio.QueueFull()
+
+        now = datetime.now(timezone.utc)
+        job = EvaluationJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            challenge_id=challenge_id,
+            status="queued",
+            created_at=now,
+            updated_at=now
+        )
+        await self.store.create(job, user_prompt)
+        try:
+            self._queue.put_nowait((job, user_prompt))
+        except asyncio.QueueFull:
+            # A concurrent submit took the last slot while the job was being
+            # stored; don't leave a queued row behind that no worker will run
+            await self.store.delete(job.id)
+            raise
+        return job
+
+    async def get(self, job_id: str, user_id: str) -> Optional[EvaluationJob]:
+        """Get a job, only if it belongs to the given user."""
+        job = await self.store.get(job_id)
+        if not job or job.user_id != user_id:
+            return None
+        return job
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job, user_prompt = await self._queue.get()
+            try:
+                await self._run(job, user_prompt)
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} failed to record job {job.id}: {str(e)}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: EvaluationJob, user_prompt: str):
+        claimed = await self.store.claim(job)
+        if claimed is None:
+            logger.info(f"Evaluation job {job.id} was claimed elsewhere, skipping")
+            return
+        job = claimed
+
+        try:
+            result = await self.evaluation_service.evaluate_for_user(
+                job.user_id, job.challenge_id, user_prompt
+            )
+            job = job.model_copy(update={
+                "status": "completed",
+                "result": result,
+                "updated_at": datetime.now(timezone.utc)
+            })
+        except Exception as e:
+            logger.warning(f"Evaluation job {job.id} failed: {str(e)}")
+            job = job.model_copy(update={
+                "status": "failed",
+                "error": str(e),
+                "updated_at": datetime.now(timezone.utc)
+            })
+
+        await self.store.update(job)
+
+
+def build_job_store(supabase: Client) -> JobStore:
+    """Create the job store selected by EVALUATION_JOB_BACKEND."""
+    if settings.EVALUATION_JOB_BACKEND == "supabase":
+        return SupabaseJobStore(supabase)
+    return InMemoryJobStore()
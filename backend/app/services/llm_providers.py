@@ -0,0 +1,393 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, List, Optional, Tuple
+import httpx
+from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.rate_limit import ProviderRateLimiter, RateLimitExceeded, send_with_retry
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(payload: dict) -> int:
+    """Rough token estimate (~4 chars per token) plus headroom for the completion."""
+    prompt_chars = sum(len(m.get("content", "")) for m in payload.get("messages", []))
+    return prompt_chars // 4 + 512
+
+
+class LatencyTracker:
+    """Rolling window of request latencies for one backend."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+        self.failures = 0
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def record_failure(self, penalty_seconds: float):
+        # Failures count as slow samples so routing drifts away from a flaky backend
+        self.failures += 1
+        self._samples.append(penalty_seconds)
+
+    @property
+    def samples(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class LLMProvider:
+    """A chat-completions backend speaking the OpenAI-compatible API."""
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        api_key: str = "",
+        model: str = "",
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model  # Overrides the requested model when set
+        self.limiter = ProviderRateLimiter(name, requests_per_minute, tokens_per_minute)
+        self.latency = LatencyTracker()
+
+    def effective_model(self, requested: str) -> str:
+        """The model this backend actually serves for a requested model name."""
+        return self.model or requested
+
+    def _prepare(self, payload: dict) -> dict:
+        if self.model:
+            return {**payload, "model": self.model}
+        return payload
+
+    def _headers(self) -> dict:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    async def chat(self, payload: dict) -> httpx.Response:
+        """POST a chat completion, paced by this backend's limiter and retried on 429/5xx."""
+        payload = self._prepare(payload)
+        client = get_http_client()
+        estimated = estimate_tokens(payload)
+        started = time.monotonic()
+
+        async def send() -> httpx.Response:
+            # Latency is measured from the last attempt, so time spent waiting
+            # for local budget or backing off isn't blamed on the backend
+            nonlocal started
+            started = time.monotonic()
+            return await client.post(
+                f"{self.base_url}/chat/completions",
+                headers=self._headers(),
+                json=payload,
+                timeout=30.0
+            )
+
+        try:
+            response = await send_with_retry(
+                send,
+                self.limiter,
+                estimated_tokens=estimated,
+                max_attempts=settings.LLM_RETRY_MAX_ATTEMPTS,
+                deadline_seconds=settings.LLM_RETRY_DEADLINE_SECONDS
+            )
+        except (asyncio.CancelledError, RateLimitExceeded):
+            raise
+        except Exception:
+            self.latency.record_failure(settings.LLM_RETRY_DEADLINE_SECONDS)
+            raise
+
+        if response.status_code != 200:
+            self.latency.record_failure(settings.LLM_RETRY_DEADLINE_SECONDS)
+            return response
+
+        self.latency.record(time.monotonic() - started)
+        try:
+            actual = response.json().get("usage", {}).get("total_tokens")
+            if actual:
+                self.limiter.record_usage(estimated, actual)
+        except ValueError:
+            pass
+        return response
+
+    @asynccontextmanager
+    async def stream(self, payload: dict) -> AsyncIterator[httpx.Response]:
+        """
+        Open a streaming chat completion. Streams are paced but not retried.
+
+        Latency is recorded once the caller has read the whole stream; errors
+        and non-200 responses count as failures, like chat().
+        """
+        payload = self._prepare({**payload, "stream": True})
+        await self.limiter.acquire(estimate_tokens(payload))
+
+        client = get_http_client()
+        started = time.monotonic()
+        try:
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/chat/completions",
+                headers=self._headers(),
+                json=payload,
+                timeout=30.0
+            ) as response:
+                self.limiter.update_from_headers(response.headers)
+                if response.status_code != 200:
+                    self.latency.record_failure(settings.LLM_RETRY_DEADLINE_SECONDS)
+                yield response
+        except httpx.HTTPError:
+            self.latency.record_failure(settings.LLM_RETRY_DEADLINE_SECONDS)
+            raise
+
+        if response.status_code == 200:
+            self.latency.record(time.monotonic() - started)
+
+    def stats(self) -> dict:
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        return {
+            "samples": self.latency.samples,
+            "failures": self.latency.failures,
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+            "rate_limit": self.limiter.stats()
+        }
+
+
+class _HedgeFailed(Exception):
+    """Both the primary and the hedge request failed; the cause is the last error."""
+
+
+class LLMRouter:
+    """
+    Routes chat completions to the backend with the lowest observed p50 latency.
+
+    Backends without enough samples keep their configured order. Failed
+    requests fall through to the next backend. With hedging enabled, a
+    duplicate request goes to the runner-up once the primary exceeds its
+    own p95, and whichever finishes second is cancelled.
+    """
+
+    def __init__(
+        self,
+        providers: List[LLMProvider],
+        hedge_enabled: bool = False,
+        min_samples: int = 20
+    ):
+        if not providers:
+            raise ValueError("At least one LLM provider must be configured")
+        self.providers = providers
+        self.hedge_enabled = hedge_enabled
+        self.min_samples = min_samples
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def ordered(self) -> List[LLMProvider]:
+        """Providers in routing order: measured ones by p50, then the rest by configuration."""
+        def key(item):
+            position, provider = item
+            if provider.latency.samples >= self.min_samples:
+                return (0, provider.latency.percentile(50), position)
+            return (1, 0.0, position)
+
+        return [provider for _, provider in sorted(enumerate(self.providers), key=key)]
+
+    def model_for(self, requested: str) -> Optional[str]:
+        """
+        The model a request for `requested` is served by, whichever backend answers.
+
+        None when backends override it differently, since the backend is only
+        chosen at request time.
+        """
+        models = {provider.effective_model(requested) for provider in self.providers}
+        return models.pop() if len(models) == 1 else None
+
+    async def chat(self, payload: dict) -> httpx.Response:
+        """Send a chat completion, failing over (and optionally hedging) across backends."""
+        candidates = self.ordered()
+        last_response: Optional[httpx.Response] = None
+        last_error: Optional[Exception] = None
+
+        index = 0
+        while index < len(candidates):
+            primary = candidates[index]
+            secondary = candidates[index + 1] if index + 1 < len(candidates) else None
+            hedge = (
+                self.hedge_enabled
+                and secondary is not None
+                and primary.latency.samples >= self.min_samples
+            )
+
+            try:
+                if hedge:
+                    response, both_tried = await self._hedged(primary, secondary, payload)
+                    # The runner-up is only spent if the hedge was actually sent
+                    index += 2 if both_tried else 1
+                else:
+                    response = await primary.chat(payload)
+                    index += 1
+            except asyncio.CancelledError:
+                raise
+            except _HedgeFailed as e:
+                logger.warning(f"LLM backend request and hedge failed: {str(e.__cause__)}")
+                last_error = e.__cause__
+                index += 2
+                continue
+            except Exception as e:
+                logger.warning(f"LLM backend request failed: {str(e)}")
+                last_error = e
+                index += 1
+                continue
+
+            if response.status_code == 200:
+                return response
+            last_response = response
+
+        if last_response is not None:
+            return last_response
+        raise last_error or Exception("No LLM backend available")
+
+    async def _hedged(
+        self,
+        primary: LLMProvider,
+        secondary: LLMProvider,
+        payload: dict
+    ) -> Tuple[httpx.Response, bool]:
+        """
+        Send to the primary, hedging to the secondary once it exceeds its p95.
+
+        Returns the response and whether the secondary was sent a request.
+        If the primary fails before its p95 its error or response is returned
+        as-is, so the caller can still fail over to the secondary; if both
+        fail, _HedgeFailed is raised from the last error.
+        """
+        first = asyncio.ensure_future(primary.chat(payload))
+        second: Optional[asyncio.Future] = None
+        try:
+            done, _ = await asyncio.wait({first}, timeout=primary.latency.percentile(95))
+            if done:
+                return first.result(), False
+
+            self.hedged += 1
+            second = asyncio.ensure_future(secondary.chat(payload))
+            pending = {first, second}
+            failed: Optional[asyncio.Future] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result().status_code == 200:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result(), True
+                    failed = task
+
+            if failed.exception() is not None:
+                raise _HedgeFailed() from failed.exception()
+            return failed.result(), True
+        finally:
+            # Cancel the loser (or both, if the caller was cancelled) so it
+            # stops consuming a connection and quota
+            for task in (first, second):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    @asynccontextmanager
+    async def stream(self, payload: dict) -> AsyncIterator[httpx.Response]:
+        """
+        Open a streaming chat completion on the fastest backend that accepts it.
+
+        Backends that fail to open the stream or answer non-200 fall through
+        to the next one; the last backend's response is yielded as-is. Once
+        the stream is handed to the caller there is no failover.
+        """
+        candidates = self.ordered()
+        last_error: Optional[Exception] = None
+
+        for position, provider in enumerate(candidates):
+            stack = AsyncExitStack()
+            try:
+                response = await stack.enter_async_context(provider.stream(payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"LLM backend stream failed to open: {str(e)}")
+                last_error = e
+                continue
+
+            async with stack:
+                if response.status_code != 200 and position + 1 < len(candidates):
+                    logger.warning(f"LLM backend stream returned {response.status_code}, failing over")
+                    continue
+                yield response
+            return
+
+        raise last_error or Exception("No LLM backend available")
+
+    def stats(self) -> dict:
+        return {
+            "routing_order": [provider.name for provider in self.ordered()],
+            "hedge_enabled": self.hedge_enabled,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "backends": {provider.name: provider.stats() for provider in self.providers}
+        }
+
+
+def build_providers() -> List[LLMProvider]:
+    """Create the backends listed in LLM_PROVIDERS, in preference order."""
+    available = {
+        "groq": lambda: LLMProvider(
+            "groq",
+            settings.GROQ_BASE_URL,
+            api_key=settings.GROQ_API_KEY,
+            requests_per_minute=settings.GROQ_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.GROQ_TOKENS_PER_MINUTE
+        ),
+        "openrouter": lambda: LLMProvider(
+            "openrouter",
+            settings.OPENROUTER_BASE_URL,
+            api_key=settings.OPENROUTER_API_KEY,
+            model=settings.OPENROUTER_MODEL
+        ),
+        "ollama": lambda: LLMProvider(
+            "ollama",
+            f"{settings.OLLAMA_BASE_URL.rstrip('/')}/v1",
+            model=settings.OLLAMA_MODEL
+        ),
+        "huggingface": lambda: LLMProvider(
+            "huggingface",
+            settings.HUGGINGFACE_BASE_URL,
+            api_key=settings.HUGGINGFACE_API_KEY,
+            model=settings.HUGGINGFACE_MODEL
+        ),
+    }
+
+    providers = []
+    for name in settings.LLM_PROVIDERS:
+        if name not in available:
+            logger.warning(f"Unknown LLM provider '{name}' in LLM_PROVIDERS, skipping")
+            continue
+        providers.append(available[name]())
+    return providers
+
+
+llm_router = LLMRouter(
+    build_providers(),
+    hedge_enabled=settings.LLM_HEDGE_ENABLED,
+    min_samples=settings.LLM_ROUTING_MIN_SAMPLES
+)
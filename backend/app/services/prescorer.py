@@ -0,0 +1,147 @@
+import re
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.models.schemas import ImprovementSuggestion
+
+# Scripts written without spaces between words (Thai, Lao, Myanmar, Khmer,
+# kana and CJK ideographs). Word counts mean nothing for them, so they are
+# left out of the tokenizer and such prompts are never scored confidently.
+_UNSEGMENTED = "\u0e00-\u0eff\u1000-\u109f\u1780-\u17ff\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_WORD = re.compile(rf"[^\W_{_UNSEGMENTED}]+(?:'[^\W_{_UNSEGMENTED}]+)*")
+_SENTENCE_END = re.compile(r"[.!?]+(?:\s|$)")
+_LIST_ITEM = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+", re.MULTILINE)
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into",
+    "is", "it", "of", "on", "or", "that", "the", "this", "to", "with", "your",
+    "you", "will", "should", "can", "their", "its", "about", "including", "include"
+}
+
+_TEMPLATED_SUGGESTIONS = {
+    "clarity": "Write your request as a complete sentence that says exactly what you want",
+    "purpose": "State the goal of the challenge and the result you expect from the AI",
+    "structure": "Break the task into steps or bullet points covering each requirement",
+    "completeness": "Add details such as audience, tone, length and output format",
+    "language": "Use full words and correct grammar so the request is easy to read",
+}
+
+
+class PreScore(BaseModel):
+    """Heuristic 0-2 estimates for the five rubric criteria."""
+    criteria: Dict[str, int]
+    confidence: Optional[float]  # None when the prompt couldn't be tokenized
+
+    @property
+    def total(self) -> int:
+        return sum(self.criteria.values())
+
+
+class PromptPreScorer:
+    """
+    Cheap, deterministic estimate of the evaluation rubric.
+
+    It looks at length, overlap with the challenge goal, list/step structure
+    and sentence statistics. It is only trusted to recognise prompts that
+    would score at the floor, so those can skip the LLM entirely.
+    """
+
+    def __init__(self):
+        self.evaluated = 0
+        self.short_circuited = 0
+        self.llm_calls_saved = 0
+
+    def score(self, user_prompt: str, goal: str) -> PreScore:
+        words = _WORD.findall(user_prompt.lower())
+        word_count = len(words)
+        non_space = [c for c in user_prompt if not c.isspace()]
+        letters = sum(c.isalpha() for c in non_space)
+        alpha_ratio = letters / len(non_space) if non_space else 0.0
+        tokenized_letters = sum(c.isalpha() for word in words for c in word)
+
+        goal_terms = {w for w in _WORD.findall(goal.lower()) if w not in _STOPWORDS and len(w) > 2}
+        prompt_terms = {w for w in words if w not in _STOPWORDS and len(w) > 2}
+        overlap = len(goal_terms & prompt_terms) / len(goal_terms) if goal_terms else 0.0
+
+        list_items = len(_LIST_ITEM.findall(user_prompt))
+        sentences = max(len(_SENTENCE_END.findall(user_prompt)), 1 if word_count else 0)
+        avg_sentence_words = word_count / sentences if sentences else 0.0
+
+        clarity = 0 if word_count < 3 or alpha_ratio < 0.5 else (1 if word_count < 12 else 2)
+        purpose = 0 if overlap == 0 and word_count < 8 else (1 if overlap < 0.3 else 2)
+        structure = 2 if list_items >= 2 else (1 if sentences >= 2 else 0)
+        completeness = 0 if word_count < 8 else (1 if word_count < 30 else 2)
+        language_quality = (
+            0 if word_count < 2 or alpha_ratio < 0.6
+            else 1 if word_count < 5 or avg_sentence_words > 60
+            else 2
+        )
+
+        # Confidence falls off quickly as prompts get longer or touch the goal,
+        # since that's where the heuristics and the LLM start to disagree
+        max_words = max(settings.PRESCORER_MAX_WORDS, 1)
+        if letters and tokenized_letters * 2 < letters:
+            confidence = None
+        elif word_count == 0 or alpha_ratio < 0.3:
+            confidence = 1.0
+        elif word_count > max_words or list_items:
+            confidence = 0.0
+        else:
+            confidence = max(0.0, 1.0 - 0.5 * word_count / max_words - 0.5 * overlap)
+
+        return PreScore(
+            criteria={
+                "clarity": clarity,
+                "purpose": purpose,
+                "structure": structure,
+                "completeness": completeness,
+                "language_quality": language_quality,
+            },
+            confidence=None if confidence is None else round(confidence, 3)
+        )
+
+    def floor_score(self, user_prompt: str, goal: str, llm_calls: int) -> Optional[PreScore]:
+        """
+        Return the PreScore if the prompt confidently scores at the floor, else None.
+
+        llm_calls is how many LLM requests the caller would otherwise make,
+        used for the savings counter.
+        """
+        self.evaluated += 1
+        prescore = self.score(user_prompt, goal)
+
+        if (
+            prescore.confidence is None
+            or prescore.total > settings.PRESCORER_FLOOR_SCORE
+            or prescore.confidence < settings.PRESCORER_MIN_CONFIDENCE
+        ):
+            return None
+
+        self.short_circuited += 1
+        self.llm_calls_saved += llm_calls
+        return prescore
+
+    def suggestions(self, prescore: PreScore) -> List[ImprovementSuggestion]:
+        """Templated suggestions for the weakest criteria."""
+        suggestions = []
+        for criterion, value in sorted(prescore.criteria.items(), key=lambda item: item[1]):
+            if value >= 2:
+                continue
+            category = "language" if criterion == "language_quality" else criterion
+            suggestions.append(ImprovementSuggestion(
+                category=category,
+                suggestion=_TEMPLATED_SUGGESTIONS[category],
+                priority="high" if value == 0 else "medium"
+            ))
+        return suggestions[:5]
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.PRESCORER_ENABLED,
+            "evaluated": self.evaluated,
+            "short_circuited": self.short_circuited,
+            "llm_calls_saved": self.llm_calls_saved
+        }
+
+
+prompt_prescorer = PromptPreScorer()
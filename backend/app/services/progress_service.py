@@ -1,22 +1,51 @@
-from supabase import create_client, Client
-from app.core.config import settings
+from supabase import Client
+from app.core.database import get_supabase
 from app.models.schemas import DashboardStats, ProgressTrend, TopMistake
 from app.services.auth_service import AuthService
-from typing import List
+from app.services.challenge_service import ChallengeService
+from app.repositories.challenge_repository import ChallengeRepository
+from app.repositories.evaluation_repository import (
+    EvaluationRepository, SCORE_COLUMNS, SUGGESTION_COLUMNS
+)
+from typing import List, Optional
 from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from collections import Counter
 import logging
 
 logger = logging.getLogger(__name__)
 
+TREND_GRANULARITIES = ("day", "week", "month")
+
+
+def _round_numeric(value: Decimal) -> float:
+    """Round half away from zero to 2 places, like Postgres ROUND(numeric, 2)."""
+    return float(value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+
+def _bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Start of the day/week (Monday)/month containing `moment`, like Postgres date_trunc."""
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "week":
+        start -= timedelta(days=start.weekday())
+    elif granularity == "month":
+        start = start.replace(day=1)
+    return start
+
 
 class ProgressService:
-    def __init__(self):
-        self.supabase: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_KEY
-        )
-        self.auth_service = AuthService()
+    def __init__(
+        self,
+        supabase: Optional[Client] = None,
+        auth_service: Optional[AuthService] = None,
+        challenge_service: Optional[ChallengeService] = None
+    ):
+        self.supabase: Client = supabase or get_supabase()
+        self.auth_service = auth_service or AuthService(self.supabase)
+        self.challenge_service = challenge_service or ChallengeService(self.supabase)
+        self.evaluations = EvaluationRepository(self.supabase)
+        self.challenges = ChallengeRepository(self.supabase)
     
     async def get_dashboard_stats(self, user_token: str) -> DashboardStats:
         """Get user's dashboard statistics."""
@@ -31,190 +60,224 @@ class ProgressService:
                 logger.error(f"Authentication failed in get_dashboard_stats: {str(auth_error)}")
                 raise Exception(f"Authentication failed: {str(auth_error)}")
             
-            # Get all evaluations for user with error handling
+            # Aggregated in Postgres, so only a handful of numbers cross the wire
             try:
-                response = self.supabase.table("evaluations")\
-                    .select("*")\
-                    .eq("user_id", user.id)\
-                    .execute()
-                
-                if not response:
-                    logger.warning("No response from Supabase evaluations query")
-                    evaluations = []
-                else:
-                    evaluations = response.data if response.data else []
-                    
+                stats = await self.evaluations.get_dashboard_statistics(user.id)
+                if stats is not None:
+                    return DashboardStats(**stats)
             except Exception as db_error:
-                logger.error(f"Database error fetching evaluations: {str(db_error)}")
-                # Return empty stats instead of crashing
-                return DashboardStats(
-                    total_attempts=0,
-                    average_score=0.0,
-                    improvement_rate=0.0,
-                    best_category="None",
-                    attempts_by_category={}
-                )
+                logger.warning(f"Dashboard statistics RPC failed, computing in Python: {str(db_error)}")
             
-            logger.info(f"Evaluations retrieved: {len(evaluations)}")
+            return await self._compute_dashboard_stats(user.id)
+        except Exception as e:
+            logger.error(f"Error in get_dashboard_stats: {str(e)}", exc_info=True)
+            # Don't re-raise if it's already a formatted error
+            if "Authentication failed" in str(e):
+                raise
+            raise Exception(f"Failed to get dashboard stats: {str(e)}")
+    
+    async def _compute_dashboard_stats(self, user_id: str) -> DashboardStats:
+        """
+        Compute dashboard statistics from the raw evaluation rows.
+        
+        Fallback for databases without get_dashboard_statistics; must give the
+        same numbers as the SQL function.
+        """
+        # Get all evaluations for user with error handling
+        try:
+            evaluations = await self.evaluations.list_all_for_user(user_id, columns=SCORE_COLUMNS)
+        except Exception as db_error:
+            logger.error(f"Database error fetching evaluations: {str(db_error)}")
+            # Return empty stats instead of crashing
+            return DashboardStats(
+                total_attempts=0,
+                average_score=0.0,
+                improvement_rate=0.0,
+                best_category="None",
+                attempts_by_category={}
+            )
+        
+        logger.info(f"Evaluations retrieved: {len(evaluations)}")
+        
+        if not evaluations:
+            logger.info("No evaluations found, returning empty stats")
+            return DashboardStats(
+                total_attempts=0,
+                average_score=0.0,
+                improvement_rate=0.0,
+                best_category="None",
+                attempts_by_category={}
+            )
+        
+        # Calculate statistics with error handling
+        try:
+            total_attempts = len(evaluations)
             
-            if not evaluations:
-                logger.info("No evaluations found, returning empty stats")
+            # Validate that evaluations have overall_score
+            valid_evaluations = [e for e in evaluations if e.get("overall_score") is not None]
+            # Halves are split in attempt order, like the SQL function
+            valid_evaluations.sort(key=lambda e: (e.get("created_at") or "", e.get("id") or 0))
+            if not valid_evaluations:
+                logger.warning("No evaluations with valid scores")
                 return DashboardStats(
-                    total_attempts=0,
+                    total_attempts=total_attempts,
                     average_score=0.0,
                     improvement_rate=0.0,
                     best_category="None",
                     attempts_by_category={}
                 )
             
-            # Calculate statistics with error handling
+            # Exact decimal sums, so rounding matches the SQL function's numerics
+            scores = [Decimal(str(e["overall_score"])) for e in valid_evaluations]
+            average_score = sum(scores) / len(scores)
+            
+            # Calculate improvement rate (compare first half vs second half)
+            improvement_rate = Decimal(0)
+            if len(scores) >= 4:
+                mid_point = len(scores) // 2
+                first_half_avg = sum(scores[:mid_point]) / mid_point
+                second_half_avg = sum(scores[mid_point:]) / (len(scores) - mid_point)
+                if first_half_avg > 0:
+                    improvement_rate = ((second_half_avg - first_half_avg) / first_half_avg) * 100
+            
+            # Resolve every attempted challenge's category in one query
+            challenge_ids = sorted({e["challenge_id"] for e in valid_evaluations if e.get("challenge_id")})
             try:
-                total_attempts = len(evaluations)
-                
-                # Validate that evaluations have overall_score
-                valid_evaluations = [e for e in evaluations if e.get("overall_score") is not None]
-                if not valid_evaluations:
-                    logger.warning("No evaluations with valid scores")
-                    return DashboardStats(
-                        total_attempts=total_attempts,
-                        average_score=0.0,
-                        improvement_rate=0.0,
-                        best_category="None",
-                        attempts_by_category={}
-                    )
-                
-                average_score = sum(e["overall_score"] for e in valid_evaluations) / len(valid_evaluations)
-                
-                # Calculate improvement rate (compare first half vs second half)
-                if len(valid_evaluations) >= 4:
-                    mid_point = len(valid_evaluations) // 2
-                    first_half_avg = sum(e["overall_score"] for e in valid_evaluations[:mid_point]) / mid_point
-                    second_half_avg = sum(e["overall_score"] for e in valid_evaluations[mid_point:]) / (len(valid_evaluations) - mid_point)
-                    if first_half_avg > 0:
-                        improvement_rate = ((second_half_avg - first_half_avg) / first_half_avg) * 100
-                    else:
-                        improvement_rate = 0.0
-                else:
-                    improvement_rate = 0.0
-                
-                # Get category statistics with error handling
-                category_scores = {}
-                for eval in valid_evaluations:
-                    try:
-                        if not eval.get("challenge_id"):
-                            continue
-                            
-                        challenge_response = self.supabase.table("challenges")\
-                            .select("category")\
-                            .eq("id", eval["challenge_id"])\
-                            .execute()
-                        
-                        if challenge_response and challenge_response.data:
-                            category = challenge_response.data[0].get("category")
-                            if category:
-                                if category not in category_scores:
-                                    category_scores[category] = []
-                                category_scores[category].append(eval["overall_score"])
-                    except Exception as cat_error:
-                        logger.warning(f"Error fetching category for challenge {eval.get('challenge_id')}: {str(cat_error)}")
-                        continue
-                
-                attempts_by_category = {
-                    cat: len(scores) for cat, scores in category_scores.items()
-                }
-                
-                # Find best category
-                if category_scores:
-                    category_averages = {
-                        cat: sum(scores) / len(scores)
-                        for cat, scores in category_scores.items()
-                    }
-                    best_category = max(category_averages, key=category_averages.get)
-                else:
-                    best_category = "None"
-                
-                return DashboardStats(
-                    total_attempts=total_attempts,
-                    average_score=round(average_score, 2),
-                    improvement_rate=round(improvement_rate, 2),
-                    best_category=best_category,
-                    attempts_by_category=attempts_by_category
-                )
-            except Exception as calc_error:
-                logger.error(f"Error calculating statistics: {str(calc_error)}", exc_info=True)
-                # Return partial stats instead of crashing
-                return DashboardStats(
-                    total_attempts=len(evaluations),
-                    average_score=0.0,
-                    improvement_rate=0.0,
-                    best_category="None",
-                    attempts_by_category={}
-                )
-        except Exception as e:
-            logger.error(f"Error in get_dashboard_stats: {str(e)}", exc_info=True)
-            # Don't re-raise if it's already a formatted error
-            if "Authentication failed" in str(e):
-                raise
-            raise Exception(f"Failed to get dashboard stats: {str(e)}")
-    
-    async def get_progress_trends(self, user_token: str, days: int = 30) -> List[ProgressTrend]:
-        """Get user's progress trends over time."""
-        try:
-            user = await self.auth_service.get_user(user_token)
+                categories = await self.challenges.get_categories(challenge_ids)
+            except Exception as cat_error:
+                logger.warning(f"Error fetching challenge categories: {str(cat_error)}")
+                categories = {}
             
-            # Get evaluations from the last N days
-            start_date = datetime.now() - timedelta(days=days)
+            category_scores = {}
+            for eval, score in zip(valid_evaluations, scores):
+                category = categories.get(eval.get("challenge_id"))
+                if category:
+                    if category not in category_scores:
+                        category_scores[category] = []
+                    category_scores[category].append(score)
             
-            response = self.supabase.table("evaluations")\
-                .select("*")\
-                .eq("user_id", user.id)\
-                .gte("created_at", start_date.isoformat())\
-                .order("created_at", desc=False)\
-                .execute()
+            attempts_by_category = {
+                cat: len(scores) for cat, scores in category_scores.items()
+            }
             
-            evaluations = response.data
+            # Find best category
+            if category_scores:
+                category_averages = {
+                    cat: sum(scores) / len(scores)
+                    for cat, scores in category_scores.items()
+                }
+                best_category = max(category_averages, key=category_averages.get)
+            else:
+                best_category = "None"
             
-            # Group by date
-            trends_by_date = {}
-            for eval in evaluations:
-                eval_date = datetime.fromisoformat(eval["created_at"]).date()
-                date_str = eval_date.isoformat()
-                
-                if date_str not in trends_by_date:
-                    trends_by_date[date_str] = {
-                        "scores": [],
-                        "attempts": 0
-                    }
-                
-                trends_by_date[date_str]["scores"].append(eval["overall_score"])
-                trends_by_date[date_str]["attempts"] += 1
+            return DashboardStats(
+                total_attempts=total_attempts,
+                average_score=_round_numeric(average_score),
+                improvement_rate=_round_numeric(improvement_rate),
+                best_category=best_category,
+                attempts_by_category=attempts_by_category
+            )
+        except Exception as calc_error:
+            logger.error(f"Error calculating statistics: {str(calc_error)}", exc_info=True)
+            # Return partial stats instead of crashing
+            return DashboardStats(
+                total_attempts=len(evaluations),
+                average_score=0.0,
+                improvement_rate=0.0,
+                best_category="None",
+                attempts_by_category={}
+            )
+    
+    async def get_progress_trends(
+        self,
+        user_token: str,
+        days: int = 30,
+        granularity: str = "day",
+        tz: str = "UTC"
+    ) -> List[ProgressTrend]:
+        """
+        Get user's attempts and average score per day, week or month.
+        
+        Buckets follow the calendar of the IANA time zone `tz`; each trend's
+        date is the first day of its bucket. Raises ValueError for an unknown
+        granularity or time zone.
+        """
+        if granularity not in TREND_GRANULARITIES:
+            raise ValueError(f"granularity must be one of: {', '.join(TREND_GRANULARITIES)}")
+        try:
+            zone = ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown time zone: {tz}")
+        
+        try:
+            user = await self.auth_service.get_user(user_token)
             
-            # Convert to list of ProgressTrend objects
-            trends = []
-            for date_str, data in sorted(trends_by_date.items()):
-                avg_score = sum(data["scores"]) / len(data["scores"])
-                trends.append(ProgressTrend(
-                    date=date_str,
-                    average_score=round(avg_score, 2),
-                    attempts=data["attempts"]
-                ))
+            # Bucketed in Postgres, so only one row per bucket crosses the wire
+            try:
+                trends = await self.evaluations.get_progress_trends(user.id, days, granularity, tz)
+                if trends is not None:
+                    return [ProgressTrend(**trend) for trend in trends]
+            except Exception as db_error:
+                logger.warning(f"Progress trends RPC failed, computing in Python: {str(db_error)}")
             
-            return trends
+            return await self._compute_progress_trends(user.id, days, granularity, zone)
         except Exception as e:
             raise Exception(f"Failed to get progress trends: {str(e)}")
     
+    async def _compute_progress_trends(
+        self,
+        user_id: str,
+        days: int,
+        granularity: str,
+        zone: ZoneInfo
+    ) -> List[ProgressTrend]:
+        """
+        Bucket the raw evaluation rows in Python.
+        
+        Fallback for databases without get_progress_trends; must give the
+        same buckets as the SQL function.
+        """
+        # The window starts at the beginning of the bucket containing (now - days)
+        start_date = _bucket_start(datetime.now(zone) - timedelta(days=days), granularity)
+        
+        evaluations = await self.evaluations.list_since(
+            user_id, start_date.isoformat(), columns=SCORE_COLUMNS
+        )
+        
+        # Group by bucket
+        trends_by_date = {}
+        for eval in evaluations:
+            local_time = datetime.fromisoformat(eval["created_at"]).astimezone(zone)
+            date_str = _bucket_start(local_time, granularity).date().isoformat()
+            
+            if date_str not in trends_by_date:
+                trends_by_date[date_str] = {
+                    "scores": [],
+                    "attempts": 0
+                }
+            
+            trends_by_date[date_str]["scores"].append(eval["overall_score"])
+            trends_by_date[date_str]["attempts"] += 1
+        
+        # Convert to list of ProgressTrend objects
+        trends = []
+        for date_str, data in sorted(trends_by_date.items()):
+            avg_score = sum(data["scores"]) / len(data["scores"])
+            trends.append(ProgressTrend(
+                date=date_str,
+                average_score=round(avg_score, 2),
+                attempts=data["attempts"]
+            ))
+        
+        return trends
+    
     async def get_top_mistakes(self, user_token: str) -> List[TopMistake]:
         """Get user's top 3 most common mistakes."""
         try:
             user = await self.auth_service.get_user(user_token)
             
             # Get all evaluations
-            response = self.supabase.table("evaluations")\
-                .select("*")\
-                .eq("user_id", user.id)\
-                .execute()
-            
-            evaluations = response.data
+            evaluations = await self.evaluations.list_all_for_user(user.id, columns=SUGGESTION_COLUMNS)
             
             # Collect all suggestions
             all_suggestions = []
@@ -254,13 +317,10 @@ class ProgressService:
         try:
             user = await self.auth_service.get_user(user_token)
             
-            # Get challenges in this category
-            challenges_response = self.supabase.table("challenges")\
-                .select("id")\
-                .eq("category", category)\
-                .execute()
-            
-            challenge_ids = [c["id"] for c in challenges_response.data]
+            # Challenge ids come from the in-process catalog, so the
+            # evaluations query below is the only round trip
+            challenges = await self.challenge_service.catalog.list(category=category)
+            challenge_ids = [c.id for c in challenges]
             
             if not challenge_ids:
                 return {
@@ -271,16 +331,10 @@ class ProgressService:
                     "recent_trend": "no_data"
                 }
             
-            # Get evaluations for these challenges
-            evaluations = []
-            for challenge_id in challenge_ids:
-                response = self.supabase.table("evaluations")\
-                    .select("*")\
-                    .eq("user_id", user.id)\
-                    .eq("challenge_id", challenge_id)\
-                    .order("created_at", desc=False)\
-                    .execute()
-                evaluations.extend(response.data)
+            # All attempts in the category, oldest first, so scores[-3:] are the latest
+            evaluations = await self.evaluations.list_for_challenges(
+                user.id, challenge_ids, columns=SCORE_COLUMNS
+            )
             
             if not evaluations:
                 return {
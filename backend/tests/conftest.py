@@ -0,0 +1,89 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+
+# Settings require these at import time; the tests never talk to Supabase
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-secret")
+os.environ.setdefault("DATABASE_URL", "postgresql://postgres@localhost:5432/postgres")
+
+from app.core.config import settings  # noqa: E402
+from app.core.database import close_db_pool, init_db_pool  # noqa: E402
+
+# A Postgres database with database/schema.sql applied (e.g. a local
+# Supabase stack). Database tests are skipped when it isn't set.
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+class Seed:
+    """Creates a throwaway user and challenges, and removes them afterwards."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.user_id = str(uuid.uuid4())
+        self.challenge_ids = []
+
+    async def create_user(self):
+        await self.pool.execute("INSERT INTO auth.users (id) VALUES ($1)", self.user_id)
+
+    async def challenge(self, category: str, difficulty: str = "beginner") -> int:
+        challenge_id = await self.pool.fetchval(
+            """
+            INSERT INTO challenges (category, title, description, goal, example_prompt, difficulty)
+            VALUES ($1, 'Test challenge', 'Description', 'Goal', 'Example', $2)
+            RETURNING id
+            """,
+            category,
+            difficulty
+        )
+        self.challenge_ids.append(challenge_id)
+        return challenge_id
+
+    async def evaluation(self, challenge_id: int, overall_score: float, created_at) -> int:
+        return await self.pool.fetchval(
+            """
+            INSERT INTO evaluations (
+                user_id, challenge_id, user_prompt, ai_output, clarity_score, specificity_score,
+                creativity_score, relevance_score, overall_score, suggestions, created_at
+            )
+            VALUES ($1, $2, 'prompt', 'output', 5, 5, 5, 5, $3, $4, $5)
+            RETURNING id
+            """,
+            self.user_id,
+            challenge_id,
+            overall_score,
+            [{"category": "clarity", "suggestion": "Be clearer", "priority": "high"}],
+            created_at
+        )
+
+    async def cleanup(self):
+        await self.pool.execute("DELETE FROM auth.users WHERE id = $1", self.user_id)
+        await self.pool.execute("DELETE FROM challenges WHERE id = ANY($1::int[])", self.challenge_ids)
+
+
+@pytest.fixture
+def run_with_db(monkeypatch):
+    """Run `scenario(seed)` with the direct pool open on TEST_DATABASE_URL."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    monkeypatch.setattr(settings, "DIRECT_DB_ENABLED", True)
+    monkeypatch.setattr(settings, "DATABASE_URL", TEST_DATABASE_URL)
+
+    def run(scenario):
+        async def main():
+            pool = await init_db_pool()
+            assert pool is not None, "could not connect to TEST_DATABASE_URL"
+            seed = Seed(pool)
+            await seed.create_user()
+            try:
+                return await scenario(seed)
+            finally:
+                await seed.cleanup()
+                await close_db_pool()
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,165 @@
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+import jwt
+import pytest
+
+from app.core import cache
+from app.core.config import settings
+from app.services.auth_service import AuthService, user_cache
+
+SECRET = "local-test-secret"
+USER_ID = str(uuid.uuid4())
+
+
+@pytest.fixture(autouse=True)
+def auth_settings(monkeypatch):
+    monkeypatch.setattr(settings, "SUPABASE_URL", "http://localhost:54321")
+    monkeypatch.setattr(settings, "SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.setattr(settings, "SUPABASE_JWT_AUDIENCE", "authenticated")
+    monkeypatch.setattr(settings, "SUPABASE_JWT_ISSUER", "")
+    monkeypatch.setattr(settings, "AUTH_VERIFY_MODE", "local")
+    monkeypatch.setattr(settings, "AUTH_REMOTE_FALLBACK", False)
+    monkeypatch.setattr(settings, "AUTH_CACHE_ENABLED", True)
+    monkeypatch.setattr(user_cache, "ttl_seconds", 300)
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+def make_token(secret: str = SECRET, expires_in: float = 3600, **overrides) -> str:
+    claims = {
+        "sub": USER_ID,
+        "email": "ada@example.com",
+        "aud": "authenticated",
+        "iss": "http://localhost:54321/auth/v1",
+        "exp": int(time.time() + expires_in),
+        "user_metadata": {"full_name": "Ada Lovelace"},
+        **overrides
+    }
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+class FakeAuth:
+    """Stands in for supabase.auth; counts remote lookups and sign-outs."""
+
+    def __init__(self):
+        self.lookups = 0
+        self.sign_outs = 0
+
+    def get_user(self, token):
+        self.lookups += 1
+        return SimpleNamespace(user=SimpleNamespace(
+            id=USER_ID,
+            email="remote@example.com",
+            user_metadata={},
+            created_at="2026-01-01T00:00:00Z"
+        ))
+
+    def sign_out(self):
+        self.sign_outs += 1
+
+
+@pytest.fixture
+def remote():
+    return FakeAuth()
+
+
+@pytest.fixture
+def service(remote):
+    client = SimpleNamespace(auth=remote)
+    return AuthService(supabase=client, auth_client=client)
+
+
+@pytest.fixture
+def local_verifications(monkeypatch):
+    """Count tokens verified locally (i.e. not served from the cache)."""
+    calls = []
+    verify = AuthService._get_user_from_claims
+
+    def counting(self, token):
+        calls.append(token)
+        return verify(self, token)
+
+    monkeypatch.setattr(AuthService, "_get_user_from_claims", counting)
+    return calls
+
+
+def test_valid_token_is_verified_locally(service, remote):
+    user = asyncio.run(service.get_user(make_token()))
+
+    assert user.id == USER_ID
+    assert user.email == "ada@example.com"
+    assert user.full_name == "Ada Lovelace"
+    assert remote.lookups == 0
+
+
+@pytest.mark.parametrize("token", [
+    make_token(expires_in=-60),
+    make_token(aud="anon"),
+    make_token(iss="https://evil.example.com/auth/v1"),
+    make_token(secret="someone-elses-secret"),
+    jwt.encode({"sub": USER_ID, "email": "ada@example.com", "aud": "authenticated"}, SECRET, algorithm="HS256"),
+], ids=["expired", "wrong_audience", "wrong_issuer", "bad_signature", "missing_exp_and_iss"])
+def test_rejected_tokens(service, remote, token):
+    with pytest.raises(Exception, match="Invalid or expired token"):
+        asyncio.run(service.get_user(token))
+    assert remote.lookups == 0
+    assert len(user_cache) == 0
+
+
+def test_bad_signature_falls_back_to_supabase_when_enabled(monkeypatch, service, remote):
+    monkeypatch.setattr(settings, "AUTH_REMOTE_FALLBACK", True)
+
+    user = asyncio.run(service.get_user(make_token(secret="someone-elses-secret")))
+
+    assert remote.lookups == 1
+    assert user.email == "remote@example.com"
+
+
+def test_expired_token_never_falls_back(monkeypatch, service, remote):
+    monkeypatch.setattr(settings, "AUTH_REMOTE_FALLBACK", True)
+
+    with pytest.raises(Exception, match="Invalid or expired token"):
+        asyncio.run(service.get_user(make_token(expires_in=-60)))
+    assert remote.lookups == 0
+
+
+def test_verified_token_is_served_from_cache(service, local_verifications):
+    token = make_token()
+
+    first = asyncio.run(service.get_user(token))
+    second = asyncio.run(service.get_user(token))
+
+    assert second == first
+    assert len(local_verifications) == 1
+
+
+def test_cache_entry_expires_at_token_exp(monkeypatch, service, local_verifications):
+    clock = SimpleNamespace(now=time.monotonic())
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    # exp is well inside AUTH_CACHE_TTL_SECONDS, so it bounds the entry
+    token = make_token(expires_in=30)
+
+    asyncio.run(service.get_user(token))
+    clock.now += 20
+    asyncio.run(service.get_user(token))
+    assert len(local_verifications) == 1
+
+    # Past exp the entry is gone, long before AUTH_CACHE_TTL_SECONDS
+    clock.now += 15
+    asyncio.run(service.get_user(token))
+    assert len(local_verifications) == 2
+
+
+def test_sign_out_invalidates_cached_token(service, remote, local_verifications):
+    token = make_token()
+    asyncio.run(service.get_user(token))
+
+    asyncio.run(service.sign_out(token))
+    asyncio.run(service.get_user(token))
+
+    assert remote.sign_outs == 1
+    assert len(local_verifications) == 2
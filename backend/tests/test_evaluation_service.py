@@ -0,0 +1,31 @@
+from app.services.evaluation_service import EvaluationService
+from app.services.llm_providers import LLMProvider, LLMRouter
+
+
+def make_service(*providers: LLMProvider) -> EvaluationService:
+    return EvaluationService(
+        llm=LLMRouter(list(providers)),
+        supabase=object(),
+        auth_service=object(),
+        challenge_service=object()
+    )
+
+
+def test_cache_key_follows_the_served_model():
+    default = make_service(LLMProvider("groq", "http://groq"))
+    overridden = make_service(LLMProvider("ollama", "http://ollama", model="llama3"))
+
+    key = default._cache_key(1, "Write a  haiku")
+
+    assert key == default._cache_key(1, "Write a haiku")
+    assert key != default._cache_key(2, "Write a haiku")
+    assert key != overridden._cache_key(1, "Write a haiku")
+
+
+def test_no_cache_key_when_backends_serve_different_models():
+    service = make_service(
+        LLMProvider("groq", "http://groq"),
+        LLMProvider("ollama", "http://ollama", model="llama3")
+    )
+
+    assert service._cache_key(1, "Write a haiku") is None
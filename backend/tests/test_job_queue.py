@@ -0,0 +1,247 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.models.schemas import EvaluationJob, EvaluationResult, EvaluationScore
+from app.services.job_queue import EvaluationJobQueue, InMemoryJobStore, SupabaseJobStore
+
+USER_ID = str(uuid.uuid4())
+
+
+class FakeEvaluationService:
+    supabase = None
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.calls = []
+
+    async def evaluate_for_user(self, user_id, challenge_id, user_prompt):
+        self.calls.append((user_id, challenge_id, user_prompt))
+        if self.error:
+            raise self.error
+        return EvaluationResult(
+            id=1,
+            user_id=user_id,
+            challenge_id=challenge_id,
+            user_prompt=user_prompt,
+            ai_output="output",
+            scores=EvaluationScore(clarity=7, specificity=7, creativity=7, relevance=7, overall=7),
+            suggestions=[],
+            created_at=datetime.now(timezone.utc)
+        )
+
+
+def make_job(status: str = "queued", updated_at: datetime = None) -> EvaluationJob:
+    now = datetime.now(timezone.utc)
+    return EvaluationJob(
+        id=str(uuid.uuid4()),
+        user_id=USER_ID,
+        challenge_id=1,
+        status=status,
+        created_at=now,
+        updated_at=updated_at or now
+    )
+
+
+async def drain(queue: EvaluationJobQueue):
+    await queue.start()
+    try:
+        await asyncio.wait_for(queue._queue.join(), timeout=5.0)
+    finally:
+        await queue.stop()
+
+
+def test_submit_then_poll_completed_result():
+    service = FakeEvaluationService()
+    queue = EvaluationJobQueue(service, store=InMemoryJobStore(), concurrency=2)
+
+    async def scenario():
+        job = await queue.submit(USER_ID, 1, "Write a haiku")
+        queued = await queue.get(job.id, USER_ID)
+        await drain(queue)
+        return job, queued, await queue.get(job.id, USER_ID), await queue.get(job.id, str(uuid.uuid4()))
+
+    job, queued, finished, other_user = asyncio.run(scenario())
+
+    assert queued.status == "queued"
+    assert job.created_at.tzinfo is not None
+    assert finished.status == "completed"
+    assert finished.result.user_prompt == "Write a haiku"
+    assert finished.updated_at.tzinfo is not None
+    assert service.calls == [(USER_ID, 1, "Write a haiku")]
+    assert other_user is None
+
+
+def test_failed_evaluation_is_recorded():
+    queue = EvaluationJobQueue(FakeEvaluationService(Exception("LLM unavailable")), store=InMemoryJobStore())
+
+    async def scenario():
+        job = await queue.submit(USER_ID, 1, "Write a haiku")
+        await drain(queue)
+        return await queue.get(job.id, USER_ID)
+
+    failed = asyncio.run(scenario())
+
+    assert failed.status == "failed"
+    assert failed.error == "LLM unavailable"
+    assert failed.result is None
+
+
+def test_submit_rejects_when_full():
+    queue = EvaluationJobQueue(FakeEvaluationService(), store=InMemoryJobStore(), max_queue_size=1)
+
+    async def scenario():
+        await queue.submit(USER_ID, 1, "first")
+        with pytest.raises(asyncio.QueueFull):
+            await queue.submit(USER_ID, 1, "second")
+
+    asyncio.run(scenario())
+    assert queue.queue_depth == 1
+
+
+class RacingStore(InMemoryJobStore):
+    """Fills the queue while a job is being stored, like a concurrent submit would."""
+
+    def __init__(self):
+        super().__init__()
+        self.queue = None
+        self.created = []
+
+    async def create(self, job, user_prompt):
+        await super().create(job, user_prompt)
+        self.created.append(job.id)
+        self.queue._queue.put_nowait((make_job(), "concurrent"))
+
+
+def test_submit_losing_the_last_slot_leaves_no_job_behind():
+    store = RacingStore()
+    queue = EvaluationJobQueue(FakeEvaluationService(), store=store, max_queue_size=1)
+    store.queue = queue
+
+    async def scenario():
+        with pytest.raises(asyncio.QueueFull):
+            await queue.submit(USER_ID, 1, "mine")
+        return await store.get(store.created[0])
+
+    assert asyncio.run(scenario()) is None
+
+
+class RecordingStore(InMemoryJobStore):
+    def __init__(self, unfinished=(), claimable=True):
+        super().__init__()
+        self.unfinished = list(unfinished)
+        self.claimable = claimable
+        self.claimed = []
+
+    async def claim(self, job):
+        self.claimed.append(job.id)
+        if not self.claimable:
+            return None
+        return await super().claim(job)
+
+    async def list_unfinished(self):
+        return self.unfinished
+
+
+def test_start_reenqueues_unfinished_jobs():
+    leftover = make_job()
+    store = RecordingStore(unfinished=[(leftover, "left over")])
+    service = FakeEvaluationService()
+    queue = EvaluationJobQueue(service, store=store)
+
+    asyncio.run(drain(queue))
+
+    assert store.claimed == [leftover.id]
+    assert service.calls == [(USER_ID, 1, "left over")]
+
+
+def test_job_claimed_elsewhere_is_skipped():
+    store = RecordingStore(claimable=False)
+    service = FakeEvaluationService()
+    queue = EvaluationJobQueue(service, store=store)
+
+    async def scenario():
+        job = await queue.submit(USER_ID, 1, "Write a haiku")
+        await drain(queue)
+        return await queue.get(job.id, USER_ID)
+
+    job = asyncio.run(scenario())
+
+    assert service.calls == []
+    assert job.status == "queued"
+
+
+class FakeQuery:
+    """Stands in for a postgrest query builder; records the calls made on it."""
+
+    def __init__(self, data):
+        self.data = data
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args))
+            return self
+        return call
+
+    def execute(self):
+        return self
+
+
+class FakeSupabase:
+    def __init__(self, data):
+        self.query = FakeQuery(data)
+
+    def table(self, name):
+        return self.query
+
+
+def job_row(job: EvaluationJob, status: str) -> dict:
+    return {
+        "id": job.id,
+        "user_id": job.user_id,
+        "challenge_id": job.challenge_id,
+        "user_prompt": "Write a haiku",
+        "status": status,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat()
+    }
+
+
+def test_supabase_claim_only_takes_queued_jobs():
+    job = make_job()
+    supabase = FakeSupabase([job_row(job, "running")])
+
+    claimed = asyncio.run(SupabaseJobStore(supabase).claim(job))
+
+    assert claimed.status == "running"
+    assert ("eq", ("id", job.id)) in supabase.query.calls
+    assert ("eq", ("status", "queued")) in supabase.query.calls
+
+
+def test_supabase_claim_of_running_job_requires_expired_lease():
+    job = make_job("running", updated_at=datetime.now(timezone.utc) - timedelta(hours=1))
+    supabase = FakeSupabase([])
+
+    claimed = asyncio.run(SupabaseJobStore(supabase).claim(job))
+
+    assert claimed is None
+    assert ("eq", ("status", "running")) in supabase.query.calls
+    (cutoff,) = [args[1] for name, args in supabase.query.calls if name == "lt"]
+    age = datetime.now(timezone.utc) - datetime.fromisoformat(cutoff)
+    assert abs(age.total_seconds() - settings.EVALUATION_JOB_LEASE_SECONDS) < 5
+
+
+def test_supabase_list_unfinished_skips_live_leases():
+    queued = make_job()
+    expired = make_job("running", updated_at=datetime.now(timezone.utc) - timedelta(hours=1))
+    live = make_job("running")
+    supabase = FakeSupabase([job_row(queued, "queued"), job_row(expired, "running"), job_row(live, "running")])
+
+    unfinished = asyncio.run(SupabaseJobStore(supabase).list_unfinished())
+
+    assert [job.id for job, _ in unfinished] == [queued.id, expired.id]
+    assert unfinished[0][1] == "Write a haiku"
@@ -0,0 +1,254 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.http import close_http_client
+from app.services.llm_providers import LLMProvider, LLMRouter
+
+
+class StandInBackend:
+    """A local OpenAI-compatible chat completions server with scripted behaviour."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.status = 200
+        self.delay = 0.0
+        self.calls = 0
+        self.completed = 0
+
+        app = FastAPI()
+
+        @app.post("/chat/completions")
+        async def chat_completions():
+            self.calls += 1
+            await asyncio.sleep(self.delay)
+            self.completed += 1
+            return JSONResponse(
+                {"choices": [{"message": {"content": self.name}}]},
+                status_code=self.status
+            )
+
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="error"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    def start(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join()
+
+    def reset(self):
+        self.status, self.delay, self.calls, self.completed = 200, 0.0, 0, 0
+
+
+@pytest.fixture(scope="module")
+def backends():
+    started = [StandInBackend("primary"), StandInBackend("secondary")]
+    for backend in started:
+        backend.start()
+    yield started
+    for backend in started:
+        backend.stop()
+
+
+@pytest.fixture
+def primary(backends):
+    backends[0].reset()
+    return backends[0]
+
+
+@pytest.fixture
+def secondary(backends):
+    backends[1].reset()
+    return backends[1]
+
+
+@pytest.fixture(autouse=True)
+def single_attempt(monkeypatch):
+    # Fail over on the first error instead of waiting out the retry backoff
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(settings, "LLM_RETRY_DEADLINE_SECONDS", 5.0)
+
+
+def unused_url() -> str:
+    """A URL nothing listens on, so requests fail with a connection error."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def make_router(primary_url: str, secondary_url: str, hedge: bool, p95: float = 0.05) -> LLMRouter:
+    providers = [LLMProvider("primary", primary_url), LLMProvider("secondary", secondary_url)]
+    # Give the primary a latency history so it routes first and hedging applies
+    for _ in range(5):
+        providers[0].latency.record(p95)
+    return LLMRouter(providers, hedge_enabled=hedge, min_samples=5)
+
+
+def run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await close_http_client()
+    return asyncio.run(main())
+
+
+PAYLOAD = {"model": "test", "messages": [{"role": "user", "content": "hi"}]}
+
+
+@pytest.mark.parametrize("hedge", [False, True])
+def test_fails_over_when_primary_is_down(secondary, hedge):
+    # A refused connection fails well inside the primary's p95, so no hedge is sent
+    router = make_router(unused_url(), secondary.url, hedge=hedge, p95=1.0)
+
+    response = run(router.chat(PAYLOAD))
+
+    assert response.status_code == 200
+    assert response.json()["choices"][0]["message"]["content"] == "secondary"
+    assert secondary.calls == 1
+    assert router.hedged == 0
+
+
+@pytest.mark.parametrize("hedge", [False, True])
+def test_fails_over_when_primary_returns_error(primary, secondary, hedge):
+    primary.status = 500
+    router = make_router(primary.url, secondary.url, hedge=hedge, p95=1.0)
+
+    response = run(router.chat(PAYLOAD))
+
+    assert response.status_code == 200
+    assert primary.calls == 1
+    assert secondary.calls == 1
+    assert router.hedged == 0
+
+
+def test_returns_last_error_when_every_backend_fails(primary, secondary):
+    primary.status = secondary.status = 503
+    router = make_router(primary.url, secondary.url, hedge=True, p95=1.0)
+
+    response = run(router.chat(PAYLOAD))
+
+    assert response.status_code == 503
+    assert primary.calls == 1
+    assert secondary.calls == 1
+
+
+def test_hedges_slow_primary_and_cancels_loser(primary, secondary):
+    primary.delay = 2.0
+    router = make_router(primary.url, secondary.url, hedge=True, p95=0.05)
+
+    started = time.monotonic()
+    response = run(router.chat(PAYLOAD))
+    elapsed = time.monotonic() - started
+
+    assert response.json()["choices"][0]["message"]["content"] == "secondary"
+    assert elapsed < primary.delay
+    assert router.hedged == 1
+    assert router.hedge_wins == 1
+    assert primary.calls == 1
+    # The primary request was abandoned before its server finished it
+    assert primary.completed == 0
+
+
+def test_no_hedge_when_primary_answers_within_p95(primary, secondary):
+    router = make_router(primary.url, secondary.url, hedge=True, p95=1.0)
+
+    response = run(router.chat(PAYLOAD))
+
+    assert response.json()["choices"][0]["message"]["content"] == "primary"
+    assert router.hedged == 0
+    assert secondary.calls == 0
+
+
+def test_cancelling_caller_cancels_primary_before_hedge():
+    router = make_router(unused_url(), unused_url(), hedge=True, p95=5.0)
+    primary_cancelled = asyncio.Event()
+
+    async def slow_chat(payload):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            primary_cancelled.set()
+            raise
+
+    router.providers[0].chat = slow_chat
+
+    async def scenario():
+        caller = asyncio.ensure_future(router.chat(PAYLOAD))
+        await asyncio.sleep(0.05)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.wait_for(primary_cancelled.wait(), timeout=1.0)
+
+    run(scenario())
+    assert router.hedged == 0
+
+
+def test_model_for_is_unambiguous_only_when_backends_agree():
+    plain = LLMRouter([LLMProvider("a", "http://a"), LLMProvider("b", "http://b")])
+    same = LLMRouter([LLMProvider("a", "http://a", model="m1"), LLMProvider("b", "http://b", model="m1")])
+    mixed = LLMRouter([LLMProvider("a", "http://a"), LLMProvider("b", "http://b", model="m1")])
+
+    assert plain.model_for("requested") == "requested"
+    assert same.model_for("requested") == "m1"
+    assert mixed.model_for("requested") is None
+
+
+async def read_stream(router: LLMRouter):
+    async with router.stream(PAYLOAD) as response:
+        body = await response.aread()
+    return response.status_code, body
+
+
+def test_stream_fails_over_when_primary_is_down(secondary):
+    router = make_router(unused_url(), secondary.url, hedge=False)
+
+    status, body = run(read_stream(router))
+
+    assert status == 200
+    assert b"secondary" in body
+    assert router.providers[0].latency.failures == 1
+    assert secondary.calls == 1
+
+
+def test_stream_fails_over_when_primary_returns_error(primary, secondary):
+    primary.status = 500
+    router = make_router(primary.url, secondary.url, hedge=False)
+    samples = router.providers[1].latency.samples
+
+    status, body = run(read_stream(router))
+
+    assert status == 200
+    assert b"secondary" in body
+    assert router.providers[0].latency.failures == 1
+    # The successful stream is recorded like a chat() latency sample
+    assert router.providers[1].latency.samples == samples + 1
+
+
+def test_stream_yields_last_error_when_every_backend_fails(primary, secondary):
+    primary.status = secondary.status = 503
+    router = make_router(primary.url, secondary.url, hedge=False)
+
+    status, _ = run(read_stream(router))
+
+    assert status == 503
+    assert primary.calls == 1
+    assert secondary.calls == 1
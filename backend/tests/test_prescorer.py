@@ -0,0 +1,95 @@
+import pytest
+
+from app.core.config import settings
+from app.services.prescorer import PromptPreScorer
+
+GOAL = "Write a product description for an online store"
+
+
+@pytest.fixture(autouse=True)
+def prescorer_settings(monkeypatch):
+    monkeypatch.setattr(settings, "PRESCORER_FLOOR_SCORE", 2)
+    monkeypatch.setattr(settings, "PRESCORER_MIN_CONFIDENCE", 0.6)
+    monkeypatch.setattr(settings, "PRESCORER_MAX_WORDS", 8)
+
+
+@pytest.fixture
+def prescorer():
+    return PromptPreScorer()
+
+
+@pytest.mark.parametrize("prompt", ["hi", "???", "", "asdf"])
+def test_floor_prompts_short_circuit(prescorer, prompt):
+    prescore = prescorer.floor_score(prompt, GOAL, llm_calls=2)
+
+    assert prescore is not None
+    assert prescore.total <= settings.PRESCORER_FLOOR_SCORE
+    assert prescorer.short_circuited == 1
+    assert prescorer.llm_calls_saved == 2
+
+
+def test_detailed_prompt_goes_to_the_llm(prescorer):
+    prompt = (
+        "Write a product description for our online store's new leather backpack. "
+        "Mention the materials, the laptop sleeve and the lifetime warranty, "
+        "aim it at commuters, keep a friendly tone and stay under 150 words."
+    )
+
+    prescore = prescorer.score(prompt, GOAL)
+
+    assert prescore.total >= 8
+    assert prescore.confidence == 0.0
+    assert prescorer.floor_score(prompt, GOAL, llm_calls=2) is None
+    assert prescorer.evaluated == 1
+    assert prescorer.short_circuited == 0
+
+
+def test_list_structured_prompt_scores_structure(prescorer):
+    prompt = "Product description:\n- leather backpack\n- laptop sleeve\n- warranty"
+
+    prescore = prescorer.score(prompt, GOAL)
+
+    assert prescore.criteria["structure"] == 2
+    assert prescore.confidence == 0.0
+    assert prescorer.floor_score(prompt, GOAL, llm_calls=1) is None
+
+
+def test_numbered_list_counts_as_structure(prescorer):
+    prompt = "1. Describe the product\n2. List its features\n3) Add a call to action"
+
+    assert prescorer.score(prompt, GOAL).criteria["structure"] == 2
+
+
+@pytest.mark.parametrize("prompt", [
+    # Cyrillic: counted word by word like Latin text
+    "Напишите подробное описание продукта для интернет-магазина: укажите материалы, "
+    "размеры, цвет, целевую аудиторию, преимущества и тон текста. "
+    "Объём не более двухсот слов, формат списка.",
+    # Devanagari combining marks are word characters too
+    "हमारे ऑनलाइन स्टोर के नए चमड़े के बैग के लिए एक विस्तृत उत्पाद विवरण लिखिए, "
+    "जिसमें सामग्री, आकार और वारंटी शामिल हों।",
+])
+def test_non_latin_prompts_are_tokenized(prescorer, prompt):
+    prescore = prescorer.score(prompt, GOAL)
+
+    assert prescore.criteria["clarity"] == 2
+    assert prescore.criteria["completeness"] >= 1
+    assert prescorer.floor_score(prompt, GOAL, llm_calls=2) is None
+
+
+@pytest.mark.parametrize("prompt", [
+    "请为我们的新款智能手表写一段产品描述，包括主要功能、电池续航、目标用户和价格区间，语气要专业，长度约两百字。",
+    "新しいスマートウォッチの商品説明を書いてください。主な機能、バッテリー、対象ユーザーを含めてください。",
+])
+def test_unsegmented_scripts_have_no_confidence(prescorer, prompt):
+    prescore = prescorer.score(prompt, GOAL)
+
+    assert prescore.confidence is None
+    assert prescorer.floor_score(prompt, GOAL, llm_calls=2) is None
+
+
+def test_suggestions_target_weakest_criteria(prescorer):
+    suggestions = prescorer.suggestions(prescorer.score("hi", GOAL))
+
+    assert [s.category for s in suggestions] == ["clarity", "purpose", "structure", "completeness", "language"]
+    assert all(s.priority == "high" for s in suggestions)
@@ -0,0 +1,77 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.schemas import DashboardStats
+from app.services.progress_service import ProgressService
+
+START = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+# (category index, overall score, minutes after START) per attempt
+CASES = {
+    "no_attempts": [],
+    "one_attempt": [(0, 6.0, 0)],
+    "three_attempts": [(0, 4.0, 0), (1, 8.0, 1), (0, 6.0, 2)],
+    "four_attempts": [(0, 2.0, 0), (0, 4.0, 1), (1, 6.0, 2), (1, 10.0, 3)],
+    "odd_count": [(0, 3.0, 0), (1, 5.0, 1), (0, 7.0, 2), (1, 4.0, 3), (0, 9.0, 4)],
+    "odd_count_declining": [(0, 9.0, 0), (0, 8.0, 1), (1, 6.0, 2), (1, 5.0, 3), (0, 2.0, 4), (1, 1.0, 5), (0, 3.0, 6)],
+    # Identical timestamps: the first half is decided by id
+    "timestamp_ties": [(0, 2.0, 0), (1, 9.0, 0), (0, 4.0, 0), (1, 7.0, 0), (0, 5.0, 1)],
+    # Equal category averages: the category attempted first wins
+    "category_average_tie": [(1, 6.0, 0), (0, 8.0, 1), (0, 4.0, 2), (1, 6.0, 3)],
+    "zero_first_half": [(0, 0.0, 0), (0, 0.0, 1), (1, 5.0, 2), (1, 5.0, 3)],
+    # Sum 49 over 8 attempts: 6.125 rounds half away from zero to 6.13
+    "half_cent_average": [(i % 2, score, i) for i, score in enumerate([6.0, 6.0, 6.0, 6.0, 6.0, 6.0, 6.0, 7.0])],
+}
+
+
+@pytest.mark.parametrize("attempts", CASES.values(), ids=CASES.keys())
+def test_python_fallback_matches_dashboard_rpc(run_with_db, attempts):
+    categories = [f"test-a-{uuid.uuid4()}", f"test-b-{uuid.uuid4()}"]
+
+    async def scenario(seed):
+        challenge_ids = [await seed.challenge(category) for category in categories]
+        for category_index, score, minutes in attempts:
+            await seed.evaluation(challenge_ids[category_index], score, START + timedelta(minutes=minutes))
+
+        service = ProgressService(supabase=object(), auth_service=object(), challenge_service=object())
+        from_rpc = await service.evaluations.get_dashboard_statistics(seed.user_id)
+        from_python = await service._compute_dashboard_stats(seed.user_id)
+        return from_rpc, from_python
+
+    from_rpc, from_python = run_with_db(scenario)
+
+    assert from_rpc is not None
+    assert from_python == DashboardStats(**from_rpc)
+
+
+class FakeEvaluations:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def list_all_for_user(self, user_id, columns):
+        return self.rows
+
+
+class FakeChallenges:
+    async def get_categories(self, challenge_ids):
+        return {challenge_id: f"category-{challenge_id}" for challenge_id in challenge_ids}
+
+
+def test_python_fallback_rounds_like_postgres_numeric():
+    # Runs without a database: the RPC returns 6.13 for this history
+    scores = [6.0] * 7 + [7.0]
+    rows = [
+        {"id": i, "challenge_id": 1, "overall_score": score, "created_at": (START + timedelta(minutes=i)).isoformat()}
+        for i, score in enumerate(scores)
+    ]
+    service = ProgressService(supabase=object(), auth_service=object(), challenge_service=object())
+    service.evaluations = FakeEvaluations(rows)
+    service.challenges = FakeChallenges()
+
+    stats = asyncio.run(service._compute_dashboard_stats("user"))
+
+    assert stats.average_score == 6.13
+    assert stats.improvement_rate == 4.17
@@ -0,0 +1,167 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.rate_limit import (
+    ProviderRateLimiter, RateLimitExceeded, parse_duration, send_with_retry
+)
+from app.services.llm_providers import LLMProvider
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    # Only the limiter sees the fake clock; the event loop keeps the real one
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=fake))
+    return fake
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("12", 12.0),
+    ("0.5", 0.5),
+    ("7.66s", 7.66),
+    ("500ms", 0.5),
+    ("2m59.56s", 179.56),
+    ("1h2m", 3720.0),
+    (" 3s ", 3.0),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == pytest.approx(seconds)
+
+
+@pytest.mark.parametrize("value", [None, "", "soon", "Wed, 21 Oct 2015 07:28:00 GMT"])
+def test_parse_duration_rejects_unknown_formats(value):
+    assert parse_duration(value) is None
+
+
+def test_requests_per_minute_window(clock):
+    limiter = ProviderRateLimiter("test", requests_per_minute=2)
+    asyncio.run(limiter.acquire())
+    clock.now += 10
+    asyncio.run(limiter.acquire())
+
+    # The third request waits for the first to leave the 60s window
+    assert limiter._delay_for(0) == pytest.approx(50.0)
+    clock.now += 50
+    assert limiter._delay_for(0) <= 0
+    assert limiter.stats()["requests_in_window"] == 1
+
+
+def test_tokens_per_minute_window(clock):
+    limiter = ProviderRateLimiter("test", tokens_per_minute=1000)
+    asyncio.run(limiter.acquire(600))
+    clock.now += 10
+    asyncio.run(limiter.acquire(300))
+
+    assert limiter._delay_for(100) <= 0
+    # 400 more only fits once the first 600 expire
+    assert limiter._delay_for(400) == pytest.approx(50.0)
+    # More than the whole budget waits for the entire window to clear
+    assert limiter._delay_for(2000) == pytest.approx(60.0)
+
+
+def test_reported_usage_corrects_token_budget(clock):
+    limiter = ProviderRateLimiter("test", tokens_per_minute=1000)
+    asyncio.run(limiter.acquire(900))
+    assert limiter._delay_for(200) > 0
+
+    limiter.record_usage(estimated_tokens=900, actual_tokens=300)
+
+    assert limiter.stats()["tokens_in_window"] == 300
+    assert limiter._delay_for(200) <= 0
+
+
+def test_retry_after_and_exhausted_budget_headers_block(clock):
+    limiter = ProviderRateLimiter("test")
+
+    limiter.update_from_headers(httpx.Headers({"retry-after": "2"}))
+    assert limiter._delay_for(0) == pytest.approx(2.0)
+
+    limiter.update_from_headers(httpx.Headers({
+        "x-ratelimit-remaining-tokens": "0",
+        "x-ratelimit-reset-tokens": "7.5s",
+        "x-ratelimit-remaining-requests": "14",
+        "x-ratelimit-reset-requests": "1m",
+    }))
+    assert limiter._delay_for(0) == pytest.approx(7.5)
+
+
+def responses(*statuses, headers=None):
+    """A send callable returning the given statuses in order, counting calls."""
+    remaining = list(statuses)
+
+    async def send():
+        send.calls += 1
+        return httpx.Response(remaining.pop(0), headers=headers or {})
+
+    send.calls = 0
+    return send
+
+
+def test_retries_using_retry_after():
+    send = responses(429, 200, headers={"retry-after": "0.05"})
+
+    started = time.monotonic()
+    response = asyncio.run(send_with_retry(send, ProviderRateLimiter("test"), base_delay=5.0))
+
+    assert response.status_code == 200
+    assert send.calls == 2
+    # Retry-After replaces the (much longer) backoff
+    assert time.monotonic() - started < 1.0
+
+
+def test_returns_response_when_retry_after_passes_deadline():
+    send = responses(429, 200, headers={"retry-after": "30"})
+
+    response = asyncio.run(send_with_retry(send, ProviderRateLimiter("test"), deadline_seconds=1.0))
+
+    assert response.status_code == 429
+    assert send.calls == 1
+
+
+def test_stops_after_max_attempts():
+    send = responses(503, 503, 503)
+
+    response = asyncio.run(send_with_retry(send, ProviderRateLimiter("test"), max_attempts=2, base_delay=0.01))
+
+    assert response.status_code == 503
+    assert send.calls == 2
+
+
+def test_exhausted_local_budget_raises_rate_limit_error():
+    limiter = ProviderRateLimiter("groq", requests_per_minute=1)
+    send = responses(200, 200)
+
+    async def scenario():
+        await send_with_retry(send, limiter, deadline_seconds=0.5)
+        await send_with_retry(send, limiter, deadline_seconds=0.5)
+
+    with pytest.raises(RateLimitExceeded, match="groq rate limit reached"):
+        asyncio.run(scenario())
+    assert send.calls == 1
+    assert limiter.queue_depth == 0
+
+
+def test_local_budget_wait_is_not_a_backend_failure(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_DEADLINE_SECONDS", 0.2)
+    provider = LLMProvider("groq", "http://127.0.0.1:9", requests_per_minute=1)
+    # Spend the only request in the window
+    asyncio.run(provider.limiter.acquire())
+
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(provider.chat({"model": "test", "messages": []}))
+    assert provider.latency.failures == 0
+    assert provider.latency.samples == 0
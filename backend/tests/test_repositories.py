@@ -0,0 +1,177 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from app.repositories import base
+from app.repositories.base import (
+    DIRECT_UNAVAILABLE, record_to_dict, run_blocking, run_direct, shutdown_db_executor
+)
+from app.repositories.challenge_repository import ChallengeRepository
+from app.repositories.evaluation_repository import (
+    SCORE_COLUMNS, SUMMARY_COLUMNS, EvaluationRepository
+)
+
+START = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def test_record_to_dict_matches_postgrest_shapes():
+    record = {
+        "id": 1,
+        "overall_score": Decimal("7.50"),
+        "created_at": START,
+        "suggestions": [{"category": "clarity"}],
+        "user_id": "7f1c..."
+    }
+
+    row = record_to_dict(record)
+
+    assert row == {
+        "id": 1,
+        "overall_score": 7.5,
+        "created_at": "2026-01-01T12:00:00+00:00",
+        "suggestions": [{"category": "clarity"}],
+        "user_id": "7f1c..."
+    }
+
+
+class FailingPool:
+    async def fetch(self, *args):
+        raise ConnectionResetError("connection lost")
+
+
+class FakeQuery:
+    """Stands in for a postgrest query builder; records the calls made on it."""
+
+    def __init__(self, data):
+        self.data = data
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args))
+            return self
+        return call
+
+    def execute(self):
+        return self
+
+
+class FakeSupabase:
+    def __init__(self, data):
+        self.query = FakeQuery(data)
+
+    def table(self, name):
+        return self.query
+
+
+def test_db_executor_is_recreated_after_shutdown():
+    # A second app lifespan in the same process (e.g. another TestClient)
+    assert asyncio.run(run_blocking(sum, [1, 2])) == 3
+    shutdown_db_executor()
+    assert asyncio.run(run_blocking(sum, [3, 4])) == 7
+
+
+def test_run_direct_without_pool_is_unavailable(monkeypatch):
+    monkeypatch.setattr(base, "get_db_pool", lambda: None)
+
+    assert asyncio.run(run_direct(lambda pool: pool.fetch("SELECT 1"))) is DIRECT_UNAVAILABLE
+
+
+def test_runtime_pool_error_falls_back_to_postgrest(monkeypatch):
+    monkeypatch.setattr(base, "get_db_pool", lambda: FailingPool())
+    supabase = FakeSupabase([{"id": 3, "category": "Coding"}])
+
+    categories = asyncio.run(ChallengeRepository(supabase).get_categories([3]))
+
+    assert categories == {3: "Coding"}
+    assert ("in_", ("id", [3])) in supabase.query.calls
+
+
+def test_challenge_reads(run_with_db):
+    category = f"test-{uuid.uuid4()}"
+
+    async def scenario(seed):
+        beginner = await seed.challenge(category, "beginner")
+        advanced = await seed.challenge(category, "advanced")
+        repository = ChallengeRepository(supabase=None)
+
+        rows = await repository.list(category=category)
+        filtered = await repository.list(category=category, difficulty="advanced")
+        categories = await repository.get_categories([beginner, advanced])
+        return beginner, advanced, rows, filtered, categories
+
+    beginner, advanced, rows, filtered, categories = run_with_db(scenario)
+
+    assert sorted(r["id"] for r in rows) == [beginner, advanced]
+    assert [r["id"] for r in filtered] == [advanced]
+    assert isinstance(rows[0]["created_at"], str)
+    datetime.fromisoformat(rows[0]["created_at"])
+    assert categories == {beginner: category, advanced: category}
+
+
+def test_evaluation_reads(run_with_db):
+    category = f"test-{uuid.uuid4()}"
+
+    async def scenario(seed):
+        first = await seed.challenge(category)
+        second = await seed.challenge(category)
+        # Two rows share a timestamp so the id tie-break is exercised
+        ids = [
+            await seed.evaluation(first, 4.0, START),
+            await seed.evaluation(second, 6.5, START + timedelta(minutes=1)),
+            await seed.evaluation(first, 8.0, START + timedelta(minutes=1)),
+            await seed.evaluation(second, 9.0, START + timedelta(minutes=2)),
+        ]
+        repository = EvaluationRepository(supabase=None)
+
+        full = await repository.get_for_user(ids[0], seed.user_id)
+        other_user = await repository.get_for_user(ids[0], str(uuid.uuid4()))
+        first_page = await repository.list_for_user(seed.user_id, limit=2, columns=SUMMARY_COLUMNS)
+        last = first_page[-1]
+        second_page = await repository.list_for_user(
+            seed.user_id,
+            limit=2,
+            before=(datetime.fromisoformat(last["created_at"]), last["id"]),
+            columns=SUMMARY_COLUMNS
+        )
+        for_challenge = await repository.list_for_user(seed.user_id, limit=10, challenge_id=first)
+        everything = await repository.list_all_for_user(seed.user_id, columns=SCORE_COLUMNS)
+        by_challenges = await repository.list_for_challenges(seed.user_id, [first, second], columns=SCORE_COLUMNS)
+        return ids, full, other_user, first_page, second_page, for_challenge, everything, by_challenges
+
+    ids, full, other_user, first_page, second_page, for_challenge, everything, by_challenges = run_with_db(scenario)
+
+    # Row shapes are what PostgREST returns
+    assert full["id"] == ids[0]
+    assert isinstance(full["user_id"], str)
+    assert full["overall_score"] == 4.0 and isinstance(full["overall_score"], float)
+    assert datetime.fromisoformat(full["created_at"]) == START
+    assert full["suggestions"] == [{"category": "clarity", "suggestion": "Be clearer", "priority": "high"}]
+    assert other_user is None
+
+    # Keyset pages: newest first by (created_at, id), no overlap
+    assert [r["id"] for r in first_page + second_page] == [ids[3], ids[2], ids[1], ids[0]]
+    assert set(first_page[0]) == set(SUMMARY_COLUMNS.split(","))
+    assert [r["id"] for r in for_challenge] == [ids[2], ids[0]]
+
+    assert sorted(r["id"] for r in everything) == sorted(ids)
+    assert set(everything[0]) == set(SCORE_COLUMNS.split(","))
+    assert [r["id"] for r in by_challenges] == ids
+
+
+def test_dashboard_statistics_rpc(run_with_db):
+    category = f"test-{uuid.uuid4()}"
+
+    async def scenario(seed):
+        challenge_id = await seed.challenge(category)
+        await seed.evaluation(challenge_id, 5.0, START)
+        await seed.evaluation(challenge_id, 7.0, START + timedelta(minutes=1))
+        return await EvaluationRepository(supabase=None).get_dashboard_statistics(seed.user_id)
+
+    stats = run_with_db(scenario)
+
+    assert stats["total_attempts"] == 2
+    assert stats["average_score"] == 6.0
+    assert stats["best_category"] == category
+    assert stats["attempts_by_category"] == {category: 2}
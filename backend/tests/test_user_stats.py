@@ -0,0 +1,132 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+START = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+STATS_COLUMNS = """
+    total_attempts, score_sum, first_half_count, first_half_sum,
+    first_half_last_at, first_half_last_id, last_attempt_at, last_attempt_id
+"""
+
+
+async def rollups(seed) -> tuple:
+    stats = await seed.pool.fetchrow(f"SELECT {STATS_COLUMNS} FROM user_stats WHERE user_id = $1", seed.user_id)
+    categories = await seed.pool.fetch(
+        """
+        SELECT category, attempts, score_sum, first_attempt_at
+        FROM user_category_stats WHERE user_id = $1 ORDER BY category
+        """,
+        seed.user_id
+    )
+    return dict(stats) if stats else None, [dict(row) for row in categories]
+
+
+async def check_against_rebuild(seed) -> tuple:
+    """Return the rollups the triggers kept and what a full rebuild computes."""
+    maintained = await rollups(seed)
+    await seed.pool.fetchval("SELECT rebuild_user_stats($1)", seed.user_id)
+    return maintained, await rollups(seed)
+
+
+def minutes(n: int) -> datetime:
+    return START + timedelta(minutes=n)
+
+
+async def two_challenges(seed):
+    return [await seed.challenge(f"test-{name}-{uuid.uuid4()}") for name in ("a", "b")]
+
+
+def test_in_order_inserts_are_counted_incrementally(run_with_db):
+    async def scenario(seed):
+        first, second = await two_challenges(seed)
+        for n, (challenge_id, score) in enumerate([(first, 4.0), (second, 6.0), (first, 7.5), (second, 9.0), (first, 3.0)]):
+            await seed.evaluation(challenge_id, score, minutes(n))
+        return await check_against_rebuild(seed)
+
+    maintained, rebuilt = run_with_db(scenario)
+
+    assert maintained == rebuilt
+    assert maintained[0]["total_attempts"] == 5
+    assert maintained[0]["first_half_count"] == 2
+
+
+def test_out_of_order_insert_rebuilds(run_with_db):
+    async def scenario(seed):
+        first, second = await two_challenges(seed)
+        await seed.evaluation(first, 4.0, minutes(10))
+        await seed.evaluation(second, 6.0, minutes(20))
+        # Imported history older than everything so far
+        await seed.evaluation(second, 9.0, minutes(0))
+        await seed.evaluation(first, 5.0, minutes(30))
+        return await check_against_rebuild(seed)
+
+    maintained, rebuilt = run_with_db(scenario)
+
+    assert maintained == rebuilt
+    assert maintained[0]["total_attempts"] == 4
+
+
+def test_multi_row_insert_with_old_and_newest_rows_counts_each_once(run_with_db):
+    async def scenario(seed):
+        first, second = await two_challenges(seed)
+        await seed.evaluation(first, 4.0, minutes(10))
+        await seed.evaluation(first, 6.0, minutes(20))
+        # The old row's trigger rebuilds from every row of the statement,
+        # including the newest one whose trigger fires after it
+        await seed.pool.execute(
+            """
+            INSERT INTO evaluations (
+                user_id, challenge_id, user_prompt, ai_output, clarity_score, specificity_score,
+                creativity_score, relevance_score, overall_score, suggestions, created_at
+            )
+            VALUES
+                ($1, $2, 'prompt', 'output', 5, 5, 5, 5, 8.0, '[]', $4),
+                ($1, $3, 'prompt', 'output', 5, 5, 5, 5, 2.0, '[]', $5)
+            """,
+            seed.user_id, first, second, minutes(0), minutes(30)
+        )
+        return await check_against_rebuild(seed)
+
+    maintained, rebuilt = run_with_db(scenario)
+
+    assert maintained == rebuilt
+    assert maintained[0]["total_attempts"] == 4
+
+
+def test_updates_and_deletes_rebuild_affected_users(run_with_db):
+    async def scenario(seed):
+        first, second = await two_challenges(seed)
+        ids = [await seed.evaluation(first, 5.0, minutes(n)) for n in range(5)]
+
+        await seed.pool.execute("UPDATE evaluations SET overall_score = 9.0 WHERE id = $1", ids[0])
+        await seed.pool.execute("UPDATE evaluations SET challenge_id = $1 WHERE id = $2", second, ids[1])
+        await seed.pool.execute("UPDATE evaluations SET created_at = $1 WHERE id = $2", minutes(60), ids[2])
+        after_updates = await check_against_rebuild(seed)
+
+        await seed.pool.execute("DELETE FROM evaluations WHERE id = ANY($1::int[])", ids[3:])
+        after_deletes = await check_against_rebuild(seed)
+        return after_updates, after_deletes
+
+    (updated, updated_rebuilt), (deleted, deleted_rebuilt) = run_with_db(scenario)
+
+    assert updated == updated_rebuilt
+    assert updated[0]["score_sum"] == 29
+    assert len(updated[1]) == 2
+    assert deleted == deleted_rebuilt
+    assert deleted[0]["total_attempts"] == 3
+
+
+def test_rebuild_returns_rebuilt_user_count(run_with_db):
+    async def scenario(seed):
+        (challenge_id, _) = await two_challenges(seed)
+        await seed.evaluation(challenge_id, 5.0, minutes(0))
+        await seed.pool.execute("UPDATE user_stats SET total_attempts = 99 WHERE user_id = $1", seed.user_id)
+
+        rebuilt = await seed.pool.fetchval("SELECT rebuild_user_stats($1)", seed.user_id)
+        return rebuilt, await rollups(seed)
+
+    rebuilt, (stats, categories) = run_with_db(scenario)
+
+    assert rebuilt == 1
+    assert stats["total_attempts"] == 1
+    assert [row["attempts"] for row in categories] == [1]
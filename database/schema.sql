@@ -32,12 +32,65 @@ CREATE TABLE IF NOT EXISTS evaluations (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Evaluation Cache Table (optional persistent tier for identical submissions)
+CREATE TABLE IF NOT EXISTS evaluation_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    challenge_id INTEGER NOT NULL REFERENCES challenges(id) ON DELETE CASCADE,
+    ai_output TEXT NOT NULL,
+    scores JSONB NOT NULL,
+    suggestions JSONB NOT NULL DEFAULT '[]',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Evaluation Jobs Table (persistent backend for the async evaluation queue)
+CREATE TABLE IF NOT EXISTS evaluation_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    challenge_id INTEGER NOT NULL REFERENCES challenges(id) ON DELETE CASCADE,
+    user_prompt TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'completed', 'failed')),
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Per-user dashboard rollups, kept current by a trigger on evaluations
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+    total_attempts INTEGER NOT NULL DEFAULT 0,
+    score_sum DECIMAL NOT NULL DEFAULT 0,
+    -- The first half of attempts in (created_at, id) order, for the improvement rate
+    first_half_count INTEGER NOT NULL DEFAULT 0,
+    first_half_sum DECIMAL NOT NULL DEFAULT 0,
+    first_half_last_at TIMESTAMP WITH TIME ZONE,
+    first_half_last_id INTEGER,
+    last_attempt_at TIMESTAMP WITH TIME ZONE,
+    last_attempt_id INTEGER,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS user_category_stats (
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    category VARCHAR(100) NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    score_sum DECIMAL NOT NULL DEFAULT 0,
+    first_attempt_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (user_id, category)
+);
+
 -- Create indexes for better query performance
 CREATE INDEX idx_evaluations_user_id ON evaluations(user_id);
 CREATE INDEX idx_evaluations_challenge_id ON evaluations(challenge_id);
 CREATE INDEX idx_evaluations_created_at ON evaluations(created_at DESC);
+-- INCLUDE lets get_progress_trends aggregate a time range from the index alone
+CREATE INDEX idx_evaluations_user_created_at ON evaluations(user_id, created_at, id) INCLUDE (overall_score);
+CREATE INDEX idx_evaluations_user_challenge_created_at ON evaluations(user_id, challenge_id, created_at, id);
 CREATE INDEX idx_challenges_category ON challenges(category);
 CREATE INDEX idx_challenges_difficulty ON challenges(difficulty);
+CREATE INDEX idx_evaluation_cache_expires_at ON evaluation_cache(expires_at);
+CREATE INDEX idx_evaluation_jobs_status ON evaluation_jobs(status, created_at);
 
 -- Row Level Security (RLS) Policies
 
@@ -73,6 +126,30 @@ CREATE POLICY "Authenticated users can view challenges"
     TO authenticated
     USING (true);
 
+-- Enable RLS on evaluation_cache (only the backend's service role uses it)
+ALTER TABLE evaluation_cache ENABLE ROW LEVEL SECURITY;
+
+-- Enable RLS on evaluation_jobs (written by the backend's service role)
+ALTER TABLE evaluation_jobs ENABLE ROW LEVEL SECURITY;
+
+-- Policy: Users can view their own evaluation jobs
+CREATE POLICY "Users can view own evaluation jobs"
+    ON evaluation_jobs FOR SELECT
+    USING (auth.uid() = user_id);
+
+-- Enable RLS on the dashboard rollups (written only by the triggers below)
+ALTER TABLE user_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_category_stats ENABLE ROW LEVEL SECURITY;
+
+-- Policy: Users can view their own rollups
+CREATE POLICY "Users can view own stats"
+    ON user_stats FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can view own category stats"
+    ON user_category_stats FOR SELECT
+    USING (auth.uid() = user_id);
+
 -- Create a function to get user statistics
 CREATE OR REPLACE FUNCTION get_user_statistics(user_uuid UUID)
 RETURNS TABLE (
@@ -89,20 +166,20 @@ BEGIN
         ROUND(MAX(overall_score)::DECIMAL, 2) as best_score,
         CASE
             WHEN COUNT(*) >= 4 THEN
-                ROUND(
+                COALESCE(ROUND(
                     (
-                        (AVG(CASE WHEN row_num > (COUNT(*) OVER () / 2) THEN overall_score END) -
-                         AVG(CASE WHEN row_num <= (COUNT(*) OVER () / 2) THEN overall_score END)) /
-                        AVG(CASE WHEN row_num <= (COUNT(*) OVER () / 2) THEN overall_score END) * 100
+                        (AVG(CASE WHEN row_num > total_count / 2 THEN overall_score END) -
+                         AVG(CASE WHEN row_num <= total_count / 2 THEN overall_score END)) /
+                        NULLIF(AVG(CASE WHEN row_num <= total_count / 2 THEN overall_score END), 0) * 100
                     )::DECIMAL,
                     2
-                )
+                ), 0)
             ELSE 0
         END as improvement_rate
     FROM (
         SELECT
             overall_score,
-            ROW_NUMBER() OVER (ORDER BY created_at) as row_num,
+            ROW_NUMBER() OVER (ORDER BY created_at, id) as row_num,
             COUNT(*) OVER () as total_count
         FROM evaluations
         WHERE user_id = user_uuid
@@ -110,6 +187,239 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Create a function to rebuild the dashboard rollups from evaluations.
+-- Backfill every user with: SELECT rebuild_user_stats();
+CREATE OR REPLACE FUNCTION rebuild_user_stats(user_uuid UUID DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    rebuilt INTEGER;
+BEGIN
+    DELETE FROM user_category_stats WHERE user_uuid IS NULL OR user_id = user_uuid;
+    DELETE FROM user_stats WHERE user_uuid IS NULL OR user_id = user_uuid;
+
+    INSERT INTO user_stats (
+        user_id, total_attempts, score_sum,
+        first_half_count, first_half_sum, first_half_last_at, first_half_last_id,
+        last_attempt_at, last_attempt_id
+    )
+    SELECT
+        user_id,
+        COUNT(*),
+        SUM(overall_score),
+        MAX(total_count) / 2,
+        COALESCE(SUM(overall_score) FILTER (WHERE row_num <= total_count / 2), 0),
+        MAX(created_at) FILTER (WHERE row_num = total_count / 2),
+        MAX(id) FILTER (WHERE row_num = total_count / 2),
+        MAX(created_at) FILTER (WHERE row_num = total_count),
+        MAX(id) FILTER (WHERE row_num = total_count)
+    FROM (
+        SELECT
+            user_id,
+            id,
+            overall_score,
+            created_at,
+            ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY created_at, id) as row_num,
+            COUNT(*) OVER (PARTITION BY user_id) as total_count
+        FROM evaluations
+        WHERE user_uuid IS NULL OR user_id = user_uuid
+    ) ordered
+    GROUP BY user_id;
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+
+    INSERT INTO user_category_stats (user_id, category, attempts, score_sum, first_attempt_at)
+    SELECT e.user_id, c.category, COUNT(*), SUM(e.overall_score), MIN(e.created_at)
+    FROM evaluations e
+    JOIN challenges c ON c.id = e.challenge_id
+    WHERE user_uuid IS NULL OR e.user_id = user_uuid
+    GROUP BY e.user_id, c.category;
+
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Supabase also grants EXECUTE on public functions to its API roles by default
+REVOKE EXECUTE ON FUNCTION rebuild_user_stats(UUID) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION rebuild_user_stats(UUID) FROM anon, authenticated;
+
+-- Create a trigger function adding each new evaluation to the rollups
+CREATE OR REPLACE FUNCTION update_user_stats()
+RETURNS TRIGGER AS $$
+DECLARE
+    stats user_stats%ROWTYPE;
+    next_attempt RECORD;
+BEGIN
+    INSERT INTO user_stats (user_id) VALUES (NEW.user_id) ON CONFLICT (user_id) DO NOTHING;
+    SELECT * INTO stats FROM user_stats WHERE user_id = NEW.user_id FOR UPDATE;
+
+    -- Already counted: an earlier row of the same statement rebuilt the
+    -- rollups, which sees every row the statement inserted
+    IF (NEW.created_at, NEW.id) = (stats.last_attempt_at, stats.last_attempt_id) THEN
+        RETURN NULL;
+    END IF;
+
+    -- An attempt older than the latest one (e.g. imported history) shifts the halves
+    IF stats.last_attempt_at IS NOT NULL
+       AND (NEW.created_at, NEW.id) < (stats.last_attempt_at, stats.last_attempt_id) THEN
+        PERFORM rebuild_user_stats(NEW.user_id);
+        RETURN NULL;
+    END IF;
+
+    stats.total_attempts := stats.total_attempts + 1;
+    stats.score_sum := stats.score_sum + NEW.overall_score;
+
+    -- The first half gains the next attempt in order whenever the total becomes even
+    IF stats.total_attempts / 2 > stats.first_half_count THEN
+        SELECT id, created_at, overall_score INTO next_attempt
+        FROM evaluations
+        WHERE user_id = NEW.user_id
+          AND (stats.first_half_last_id IS NULL
+               OR (created_at, id) > (stats.first_half_last_at, stats.first_half_last_id))
+        ORDER BY created_at, id
+        LIMIT 1;
+
+        stats.first_half_count := stats.first_half_count + 1;
+        stats.first_half_sum := stats.first_half_sum + next_attempt.overall_score;
+        stats.first_half_last_at := next_attempt.created_at;
+        stats.first_half_last_id := next_attempt.id;
+    END IF;
+
+    UPDATE user_stats SET
+        total_attempts = stats.total_attempts,
+        score_sum = stats.score_sum,
+        first_half_count = stats.first_half_count,
+        first_half_sum = stats.first_half_sum,
+        first_half_last_at = stats.first_half_last_at,
+        first_half_last_id = stats.first_half_last_id,
+        last_attempt_at = NEW.created_at,
+        last_attempt_id = NEW.id,
+        updated_at = NOW()
+    WHERE user_id = NEW.user_id;
+
+    INSERT INTO user_category_stats (user_id, category, attempts, score_sum, first_attempt_at)
+    SELECT NEW.user_id, c.category, 1, NEW.overall_score, NEW.created_at
+    FROM challenges c
+    WHERE c.id = NEW.challenge_id
+    ON CONFLICT (user_id, category) DO UPDATE SET
+        attempts = user_category_stats.attempts + 1,
+        score_sum = user_category_stats.score_sum + EXCLUDED.score_sum,
+        first_attempt_at = LEAST(user_category_stats.first_attempt_at, EXCLUDED.first_attempt_at);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Create a trigger function recounting users whose evaluations were changed or
+-- deleted. Those are rare, so each affected user is rebuilt once per statement.
+CREATE OR REPLACE FUNCTION refresh_user_stats()
+RETURNS TRIGGER AS $$
+DECLARE
+    affected UUID;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        FOR affected IN SELECT DISTINCT user_id FROM old_rows LOOP
+            PERFORM rebuild_user_stats(affected);
+        END LOOP;
+    ELSE
+        FOR affected IN
+            SELECT o.user_id FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (o.user_id, o.challenge_id, o.overall_score, o.created_at)
+                IS DISTINCT FROM (n.user_id, n.challenge_id, n.overall_score, n.created_at)
+            UNION
+            SELECT n.user_id FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE o.user_id <> n.user_id
+        LOOP
+            PERFORM rebuild_user_stats(affected);
+        END LOOP;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS evaluations_user_stats ON evaluations;
+CREATE TRIGGER evaluations_user_stats
+    AFTER INSERT ON evaluations
+    FOR EACH ROW EXECUTE FUNCTION update_user_stats();
+
+DROP TRIGGER IF EXISTS evaluations_user_stats_delete ON evaluations;
+CREATE TRIGGER evaluations_user_stats_delete
+    AFTER DELETE ON evaluations
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_user_stats();
+
+DROP TRIGGER IF EXISTS evaluations_user_stats_update ON evaluations;
+CREATE TRIGGER evaluations_user_stats_update
+    AFTER UPDATE ON evaluations
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_user_stats();
+
+-- Create a function returning everything the dashboard shows in one call,
+-- read from the rollups so its cost doesn't grow with a user's history
+CREATE OR REPLACE FUNCTION get_dashboard_statistics(user_uuid UUID)
+RETURNS JSON AS $$
+    SELECT json_build_object(
+        'total_attempts', COALESCE(s.total_attempts, 0),
+        'average_score', COALESCE(ROUND(s.score_sum / NULLIF(s.total_attempts, 0), 2), 0),
+        'improvement_rate', CASE
+            WHEN s.total_attempts >= 4 AND s.first_half_sum > 0 THEN
+                ROUND(
+                    ((s.score_sum - s.first_half_sum) / (s.total_attempts - s.first_half_count)
+                     - s.first_half_sum / s.first_half_count)
+                    / (s.first_half_sum / s.first_half_count) * 100,
+                    2
+                )
+            ELSE 0
+        END,
+        'best_category', COALESCE(
+            (SELECT category FROM user_category_stats
+             WHERE user_id = user_uuid
+             ORDER BY score_sum / attempts DESC, first_attempt_at
+             LIMIT 1),
+            'None'
+        ),
+        'attempts_by_category', COALESCE(
+            (SELECT json_object_agg(category, attempts) FROM user_category_stats WHERE user_id = user_uuid),
+            '{}'::json
+        )
+    )
+    FROM (SELECT user_uuid AS user_id) requested
+    LEFT JOIN user_stats s ON s.user_id = requested.user_id;
+$$ LANGUAGE sql STABLE;
+
+-- Create a function returning progress trends bucketed by day, week or month
+-- in the user's time zone. The window starts at the beginning of the bucket
+-- containing (now - days), so the first bucket is complete.
+CREATE OR REPLACE FUNCTION get_progress_trends(
+    user_uuid UUID,
+    days INTEGER DEFAULT 30,
+    granularity TEXT DEFAULT 'day',
+    tz TEXT DEFAULT 'UTC'
+)
+RETURNS JSON AS $$
+    SELECT COALESCE(
+        json_agg(
+            json_build_object(
+                'date', to_char(buckets.bucket, 'YYYY-MM-DD'),
+                'average_score', buckets.average_score,
+                'attempts', buckets.attempts
+            )
+            ORDER BY buckets.bucket
+        ),
+        '[]'::json
+    )
+    FROM (
+        SELECT
+            date_trunc(granularity, e.created_at AT TIME ZONE tz) AS bucket,
+            ROUND(AVG(e.overall_score), 2) AS average_score,
+            COUNT(*) AS attempts
+        FROM evaluations e
+        WHERE e.user_id = user_uuid
+          AND e.created_at >= date_trunc(granularity, (NOW() AT TIME ZONE tz) - make_interval(days => days))
+                              AT TIME ZONE tz
+        GROUP BY 1
+    ) buckets;
+$$ LANGUAGE sql STABLE;
+
 -- Create a view for dashboard statistics
 CREATE OR REPLACE VIEW user_dashboard_stats AS
 SELECT
@@ -127,3 +437,5 @@ GROUP BY e.user_id;
 -- Grant necessary permissions
 GRANT SELECT ON user_dashboard_stats TO authenticated;
 GRANT EXECUTE ON FUNCTION get_user_statistics TO authenticated;
+GRANT EXECUTE ON FUNCTION get_dashboard_statistics TO authenticated;
+GRANT EXECUTE ON FUNCTION get_progress_trends TO authenticated;
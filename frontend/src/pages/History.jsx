@@ -14,6 +14,7 @@ const History = () => {
   const [error, setError] = useState("");
   const [page, setPage] = useState(0);
   const [hasMore, setHasMore] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
 
   useEffect(() => {
     fetchHistory();
@@ -25,16 +26,17 @@ const History = () => {
       setError(""); // Clear previous errors
       const response = await evaluationApi.getHistory({
         limit: 10,
-        offset: page * 10,
+        cursor: page === 0 ? undefined : nextCursor,
       });
 
       if (page === 0) {
-        setHistory(response.data);
+        setHistory(response.data.items);
       } else {
-        setHistory([...history, ...response.data]);
+        setHistory([...history, ...response.data.items]);
       }
 
-      setHasMore(response.data.length === 10);
+      setNextCursor(response.data.next_cursor);
+      setHasMore(response.data.next_cursor !== null);
     } catch (err) {
       console.error("History error:", err);
       
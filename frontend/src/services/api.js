@@ -44,7 +44,14 @@ export const evaluationApi = {
 // Progress API
 export const progressApi = {
   getDashboard: () => api.get("/api/progress/dashboard"),
-  getTrends: (days) => api.get("/api/progress/trends", { params: { days } }),
+  getTrends: (days, granularity = "day") =>
+    api.get("/api/progress/trends", {
+      params: {
+        days,
+        granularity,
+        tz: Intl.DateTimeFormat().resolvedOptions().timeZone,
+      },
+    }),
   getMistakes: () => api.get("/api/progress/mistakes"),
   getCategoryStats: (category) => api.get(`/api/progress/category/${category}`),
 };